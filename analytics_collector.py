@@ -18,6 +18,9 @@ from typing import Dict, List, Optional, Any
 from pathlib import Path
 import uuid
 import hashlib
+import numpy as np
+
+from evaluation import RecommendationEvaluator
 
 # Try to use Supabase for cloud storage
 try:
@@ -33,6 +36,16 @@ class AnalyticsCollector:
     Supports both local JSON and Supabase storage.
     """
     
+    # Map event types to Supabase table names
+    TABLES = {
+        'api_calls': 'analytics_api_calls',
+        'recommendations': 'analytics_recommendations',
+        'interactions': 'analytics_interactions',
+        'feedback': 'analytics_feedback',
+        'sessions': 'analytics_sessions',
+        'ab_tests': 'analytics_ab_tests'
+    }
+    
     def __init__(self, local_dir: str = "data/analytics"):
         """Initialize analytics collector with local fallback."""
         self.local_dir = Path(local_dir)
@@ -62,6 +75,10 @@ class AnalyticsCollector:
     
     def _save_local(self, event_type: str, data: Dict):
         """Save event to local JSON file."""
+        self._save_local_many(event_type, [data])
+    
+    def _save_local_many(self, event_type: str, data: List[Dict]):
+        """Append several events to a local JSON file with a single read/rewrite."""
         file_path = self.files.get(event_type)
         if not file_path:
             return
@@ -72,7 +89,7 @@ class AnalyticsCollector:
         except:
             events = []
         
-        events.append(data)
+        events.extend(data)
         
         # Keep only last 10000 events per type
         if len(events) > 10000:
@@ -99,17 +116,7 @@ class AnalyticsCollector:
         if not client:
             return []
         
-        # Map event types to table names
-        table_mapping = {
-            'api_calls': 'analytics_api_calls',
-            'recommendations': 'analytics_recommendations',
-            'interactions': 'analytics_interactions',
-            'feedback': 'analytics_feedback',
-            'sessions': 'analytics_sessions',
-            'ab_tests': 'analytics_ab_tests'
-        }
-        
-        table_name = table_mapping.get(event_type)
+        table_name = self.TABLES.get(event_type)
         if not table_name:
             return []
         
@@ -189,16 +196,17 @@ class AnalyticsCollector:
     # RECOMMENDATION TRACKING
     # ==========================================
     
-    def track_recommendation(self,
-                            username: str,
-                            recommendation_id: str,
-                            recommendation_type: str,
-                            items: List[Dict],
-                            context: Dict,
-                            algorithm_version: str = "v1.0",
-                            ab_variant: str = "control"):
+    def build_recommendation_event(self,
+                                  username: str,
+                                  recommendation_id: str,
+                                  recommendation_type: str,
+                                  items: List[Dict],
+                                  context: Dict,
+                                  algorithm_version: str = "v1.0",
+                                  ab_variant: str = "control") -> Dict:
         """
-        Track recommendation generation event.
+        Build a recommendation generation event without writing it.
+        Use with track_batch() or track_events() to store several events at once.
         
         Args:
             username: User receiving recommendation
@@ -208,8 +216,11 @@ class AnalyticsCollector:
             context: Context data (weather, preferences, etc.)
             algorithm_version: Version of recommendation algorithm
             ab_variant: A/B test variant if applicable
+            
+        Returns:
+            Event dictionary ready for storage
         """
-        event = {
+        return {
             'id': recommendation_id,
             'timestamp': datetime.now().isoformat(),
             'username': username,
@@ -233,6 +244,31 @@ class AnalyticsCollector:
             'algorithm_version': algorithm_version,
             'ab_variant': ab_variant
         }
+    
+    def track_recommendation(self,
+                            username: str,
+                            recommendation_id: str,
+                            recommendation_type: str,
+                            items: List[Dict],
+                            context: Dict,
+                            algorithm_version: str = "v1.0",
+                            ab_variant: str = "control"):
+        """
+        Track recommendation generation event.
+        
+        Args:
+            username: User receiving recommendation
+            recommendation_id: Unique ID for this recommendation batch
+            recommendation_type: Type (outfit, shopping, similar_items)
+            items: List of recommended items with scores
+            context: Context data (weather, preferences, etc.)
+            algorithm_version: Version of recommendation algorithm
+            ab_variant: A/B test variant if applicable
+        """
+        event = self.build_recommendation_event(
+            username, recommendation_id, recommendation_type, items, context,
+            algorithm_version, ab_variant
+        )
         
         client = self._get_supabase()
         if client:
@@ -245,19 +281,54 @@ class AnalyticsCollector:
         self._save_local('recommendations', event)
         return recommendation_id
     
+    def track_batch(self, event_type: str, events: List[Dict]):
+        """
+        Store several already-built events of one type in a single write.
+        
+        Args:
+            event_type: Event type key (e.g. 'recommendations')
+            events: Event dictionaries, e.g. from build_recommendation_event()
+        """
+        self.track_events({event_type: events})
+    
+    def track_events(self, events_by_type: Dict[str, List[Dict]]):
+        """
+        Store already-built events of several types in one call: one Supabase
+        client lookup, then one insert (or one local file rewrite) per type.
+        
+        Args:
+            events_by_type: Mapping of event type key to event dictionaries,
+                written in mapping order
+        """
+        client = self._get_supabase()
+        
+        for event_type, events in events_by_type.items():
+            if not events:
+                continue
+            
+            if client and event_type in self.TABLES:
+                try:
+                    client.table(self.TABLES[event_type]).insert(events).execute()
+                    continue
+                except:
+                    pass
+            
+            self._save_local_many(event_type, events)
+    
     # ==========================================
     # USER INTERACTION TRACKING
     # ==========================================
     
-    def track_interaction(self,
-                         username: str,
-                         interaction_type: str,
-                         item_id: str,
-                         recommendation_id: str = None,
-                         item_rank: int = None,
-                         metadata: Dict = None):
+    def build_interaction_event(self,
+                                username: str,
+                                interaction_type: str,
+                                item_id: str,
+                                recommendation_id: str = None,
+                                item_rank: int = None,
+                                metadata: Dict = None) -> Dict:
         """
-        Track user interaction with recommended items.
+        Build a user interaction event without writing it.
+        Use with track_events() to store it together with other events.
         
         Args:
             username: User performing interaction
@@ -266,8 +337,11 @@ class AnalyticsCollector:
             recommendation_id: ID of recommendation batch (for CTR calculation)
             item_rank: Position of item in recommendation list
             metadata: Additional interaction data
+            
+        Returns:
+            Event dictionary ready for storage
         """
-        event = {
+        return {
             'id': str(uuid.uuid4()),
             'timestamp': datetime.now().isoformat(),
             'username': username,
@@ -277,6 +351,28 @@ class AnalyticsCollector:
             'item_rank': item_rank,
             'metadata': metadata or {}
         }
+    
+    def track_interaction(self,
+                         username: str,
+                         interaction_type: str,
+                         item_id: str,
+                         recommendation_id: str = None,
+                         item_rank: int = None,
+                         metadata: Dict = None):
+        """
+        Track user interaction with recommended items.
+        
+        Args:
+            username: User performing interaction
+            interaction_type: view | click | save | purchase | dismiss | share
+            item_id: ID of item interacted with
+            recommendation_id: ID of recommendation batch (for CTR calculation)
+            item_rank: Position of item in recommendation list
+            metadata: Additional interaction data
+        """
+        event = self.build_interaction_event(
+            username, interaction_type, item_id, recommendation_id, item_rank, metadata
+        )
         
         client = self._get_supabase()
         if client:
@@ -292,16 +388,17 @@ class AnalyticsCollector:
     # FEEDBACK COLLECTION
     # ==========================================
     
-    def track_feedback(self,
-                      username: str,
-                      recommendation_id: str,
-                      feedback_type: str,
-                      ratings: Dict,
-                      items_rated: List[str] = None,
-                      comments: str = None,
-                      context: Dict = None):
+    def build_feedback_event(self,
+                             username: str,
+                             recommendation_id: str,
+                             feedback_type: str,
+                             ratings: Dict,
+                             items_rated: List[str] = None,
+                             comments: str = None,
+                             context: Dict = None) -> Dict:
         """
-        Track user feedback on recommendations.
+        Build a user feedback event without writing it.
+        Use with track_events() to store it together with other events.
         
         Args:
             username: User providing feedback
@@ -316,8 +413,11 @@ class AnalyticsCollector:
             items_rated: List of specific item IDs rated
             comments: Free-text comments
             context: Context at time of rating (weather, etc.)
+            
+        Returns:
+            Event dictionary ready for storage
         """
-        event = {
+        return {
             'id': str(uuid.uuid4()),
             'timestamp': datetime.now().isoformat(),
             'username': username,
@@ -329,6 +429,35 @@ class AnalyticsCollector:
             'context': context or {},
             'nps_score': ratings.get('satisfaction', 3) * 2  # Convert to NPS-like 1-10
         }
+    
+    def track_feedback(self,
+                      username: str,
+                      recommendation_id: str,
+                      feedback_type: str,
+                      ratings: Dict,
+                      items_rated: List[str] = None,
+                      comments: str = None,
+                      context: Dict = None):
+        """
+        Track user feedback on recommendations.
+        
+        Args:
+            username: User providing feedback
+            recommendation_id: ID of recommendation being rated
+            feedback_type: implicit | explicit | survey
+            ratings: Dictionary of rating dimensions
+                - relevance: 1-5 (how relevant to weather/occasion)
+                - satisfaction: 1-5 (overall satisfaction)
+                - diversity: 1-5 (variety of suggestions)
+                - personalization: 1-5 (matches personal style)
+                - would_wear: 1-5 (likelihood to actually wear)
+            items_rated: List of specific item IDs rated
+            comments: Free-text comments
+            context: Context at time of rating (weather, etc.)
+        """
+        event = self.build_feedback_event(
+            username, recommendation_id, feedback_type, ratings, items_rated, comments, context
+        )
         
         client = self._get_supabase()
         if client:
@@ -634,7 +763,7 @@ class AnalyticsCollector:
                 'sample_size': 0
             }
         
-        # Track relevant items using item-specific feedback when available
+        # Per feedback row: how many recommended items were relevant, out of how many shown
         relevant_counts = []
         total_recommended = []
         
@@ -645,12 +774,8 @@ class AnalyticsCollector:
             # If we have item-specific ratings, use those (more accurate)
             if item_ratings:
                 # Count items with rating >= 4 as relevant
-                relevant_items = sum(1 for rating in item_ratings.values() if rating >= 4)
-                total_items = len(item_ratings)
-                
-                if total_items > 0:
-                    relevant_counts.append(relevant_items)
-                    total_recommended.append(total_items)
+                relevant_counts.append(sum(1 for rating in item_ratings.values() if rating >= 4))
+                total_recommended.append(len(item_ratings))
             else:
                 # Fallback to overall relevance rating (legacy format)
                 ratings = f.get('ratings', {})
@@ -669,8 +794,9 @@ class AnalyticsCollector:
                 
                 total_recommended.append(k)
         
-        # Calculate precision (relevant / recommended)
-        precision = sum(relevant_counts) / sum(total_recommended) if total_recommended else 0
+        # Calculate precision (relevant / recommended), pooled over all rows
+        total_shown = sum(total_recommended)
+        precision = sum(relevant_counts) / total_shown if total_shown else 0
         
         # For recall, assume total relevant items = 5 per context
         # This is an estimate since we don't know the full universe of relevant items
@@ -691,36 +817,19 @@ class AnalyticsCollector:
         """
         Calculate NDCG@K from user feedback rankings.
         """
-        import numpy as np
-        
         feedback = self._load_events('feedback')
         
         if not feedback:
             return {'ndcg_at_3': 0, 'sample_size': 0}
         
-        ndcg_scores = []
-        
-        for f in feedback:
-            ratings = f.get('ratings', {})
-            relevance = ratings.get('relevance', 3)
-            
-            # Simulate per-item scores based on overall relevance
-            # In a real system, users would rate each item individually
-            scores = [relevance, relevance - 0.5, relevance - 1.0]
-            scores = [max(0, s) for s in scores]
-            
-            # DCG
-            dcg = sum(s / np.log2(i + 2) for i, s in enumerate(scores))
-            
-            # Ideal DCG
-            ideal_scores = sorted(scores, reverse=True)
-            idcg = sum(s / np.log2(i + 2) for i, s in enumerate(ideal_scores))
-            
-            ndcg = dcg / idcg if idcg > 0 else 0
-            ndcg_scores.append(ndcg)
+        # Simulate per-item scores based on overall relevance
+        # In a real system, users would rate each item individually
+        relevance = np.array([f.get('ratings', {}).get('relevance', 3) for f in feedback], dtype=float)
+        scores = np.maximum(relevance[:, None] - np.array([0.0, 0.5, 1.0]), 0)
+        ndcg_scores = RecommendationEvaluator.ndcg_at_k_batch(scores, k=3)
         
         return {
-            'ndcg_at_3': round(np.mean(ndcg_scores), 3) if ndcg_scores else 0,
+            'ndcg_at_3': round(float(ndcg_scores.mean()), 3),
             'sample_size': len(feedback)
         }
     
@@ -2,6 +2,7 @@ import streamlit as st
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
+import string
 import warnings
 
 # Load environment variables FIRST
@@ -124,6 +125,61 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# HTML card templates, compiled once at import instead of re-built on every rerun
+_WEATHER_CARD_TMPL = string.Template("""
+    <div class='weather-card'>
+        <div style='font-size: 3.5rem; margin-bottom: 0.5rem;'>${icon}</div>
+        <h2 style='margin: 0.5rem 0;'>${temp}°C</h2>
+        <p style='font-size: 0.85rem; opacity: 0.85; margin: 0.3rem 0;'>Feels like ${feels_like}°C</p>
+        <p style='font-size: 1.1rem; text-transform: capitalize; margin: 0.5rem 0;'>${description}</p>
+        <p style='margin: 0.5rem 0;'>📍 ${city}</p>
+        <div style='display: flex; justify-content: space-around; margin-top: 1rem; padding-top: 1rem; border-top: 1px solid rgba(255,255,255,0.2); font-size: 0.9rem;'>
+            <div>💧 ${humidity}%</div>
+            <div>🌬️ ${wind_speed} m/s</div>
+        </div>
+    </div>
+""")
+
+_FORECAST_DAY_TMPL = string.Template("""
+    <div style='background: white; padding: 0.6rem 1rem; border-radius: 8px; 
+    margin: 0.4rem 0; display: flex; justify-content: space-between; align-items: center; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
+        <div style='flex: 1; font-size: 0.9rem;'><strong>${day_name}</strong></div>
+        <div style='font-size: 1.8rem; margin: 0 0.5rem;'>${icon}</div>
+        <div style='flex: 1; text-align: center;'><strong style='font-size: 1.1rem;'>${temp}°C</strong></div>
+        <div style='flex: 1; text-align: right; font-size: 0.85rem; color: #666;'>${condition}</div>
+    </div>
+""")
+
+_OUTFIT_ITEM_TMPL = string.Template("""
+    <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
+    color: white; padding: 0.6rem 1rem; border-radius: 8px; margin: 0.4rem 0; 
+    display: flex; align-items: center;'>
+        <span style='margin-right: 0.5rem; font-size: 1.2rem;'>✓</span>
+        <span>${item}</span>
+    </div>
+""")
+
+_WARDROBE_ITEM_TMPL = string.Template("""
+    <div style='background: #f8f9fa; padding: 0.6rem 1rem; border-radius: 8px; 
+    margin: 0.4rem 0; display: flex; align-items: center; border-left: 3px solid ${color};'>
+        <span style='display:inline-block; width:16px; height:16px; 
+        background:${color}; border-radius:50%; margin-right:10px; border: 2px solid white; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'></span>
+        <strong>${name}</strong> 
+        <span style='margin-left: 0.5rem; color: #666; font-size: 0.85rem;'>(${type})</span>
+    </div>
+""")
+
+_RECOMMENDATION_ITEM_TMPL = string.Template("""
+    <div class='recommendation-item' style='text-align:center;'>
+        <div style='font-size: 3rem; margin-bottom: 0.5rem;'>👔</div>
+        <strong>${name}</strong><br>
+        <span style='color: #667eea; font-size: 1.2rem;'>${price}</span><br>
+        <small>${style} Style</small><br>
+        <span style='background: #667eea; color: white; padding: 2px 8px; 
+        border-radius: 12px; font-size: 0.8rem;'>${match} Match</span>
+    </div>
+""")
+
 # Initialize session state
 if 'logged_in' not in st.session_state:
     st.session_state.logged_in = False
@@ -164,6 +220,19 @@ analytics = get_analytics()
 # Initialize weather service
 weather_service = WeatherService()
 
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _current_weather(city: str) -> dict:
+    """Current weather shared by the weather card, outfit and shopping sections for 10 minutes."""
+    return weather_service.get_current_weather(city)
+
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _forecast(city: str, days: int) -> dict:
+    """Daily forecast for a city, shared across sessions for 30 minutes."""
+    return weather_service.get_forecast(city, days)
+
+
 # Authentication functions
 def login_page():
     """Display login/registration page"""
@@ -389,43 +458,23 @@ def home_page():
         
         # Get real weather data
         if forecast_option == "Today":
-            weather = weather_service.get_current_weather(city)
+            weather = _current_weather(city)
             
-            st.markdown(f"""
-                <div class='weather-card'>
-                    <div style='font-size: 3.5rem; margin-bottom: 0.5rem;'>{weather['icon']}</div>
-                    <h2 style='margin: 0.5rem 0;'>{weather['temp']}°C</h2>
-                    <p style='font-size: 0.85rem; opacity: 0.85; margin: 0.3rem 0;'>Feels like {weather['feels_like']}°C</p>
-                    <p style='font-size: 1.1rem; text-transform: capitalize; margin: 0.5rem 0;'>{weather['description']}</p>
-                    <p style='margin: 0.5rem 0;'>📍 {weather['city']}</p>
-                    <div style='display: flex; justify-content: space-around; margin-top: 1rem; padding-top: 1rem; border-top: 1px solid rgba(255,255,255,0.2); font-size: 0.9rem;'>
-                        <div>💧 {weather['humidity']}%</div>
-                        <div>🌬️ {weather['wind_speed']} m/s</div>
-                    </div>
-                </div>
-            """, unsafe_allow_html=True)
+            st.markdown(_WEATHER_CARD_TMPL.substitute(weather), unsafe_allow_html=True)
         else:
             days = 7 if forecast_option == "7 Days" else 14
-            forecast_data = weather_service.get_forecast(city, days)
+            forecast_data = _forecast(city, days)
             
             st.markdown(f"<p style='text-align: center; font-weight: bold; margin-bottom: 1rem;'>📍 {forecast_data['city']} - Next {days} Days</p>", unsafe_allow_html=True)
             
             # Display forecast in scrollable container
-            forecast_html = "<div style='max-height: 400px; overflow-y: auto;'>"
-            for day in forecast_data['forecast']:
-                date_obj = datetime.fromisoformat(day['date'])
-                day_name = date_obj.strftime("%a, %b %d")
-                
-                forecast_html += f"""
-                    <div style='background: white; padding: 0.6rem 1rem; border-radius: 8px; 
-                    margin: 0.4rem 0; display: flex; justify-content: space-between; align-items: center; box-shadow: 0 2px 4px rgba(0,0,0,0.05);'>
-                        <div style='flex: 1; font-size: 0.9rem;'><strong>{day_name}</strong></div>
-                        <div style='font-size: 1.8rem; margin: 0 0.5rem;'>{day['icon']}</div>
-                        <div style='flex: 1; text-align: center;'><strong style='font-size: 1.1rem;'>{day['temp']}°C</strong></div>
-                        <div style='flex: 1; text-align: right; font-size: 0.85rem; color: #666;'>{day['condition']}</div>
-                    </div>
-                """
-            forecast_html += "</div>"
+            forecast_html = "<div style='max-height: 400px; overflow-y: auto;'>" + "".join(
+                _FORECAST_DAY_TMPL.substitute(
+                    day,
+                    day_name=datetime.fromisoformat(day['date']).strftime("%a, %b %d"),
+                )
+                for day in forecast_data['forecast']
+            ) + "</div>"
             st.markdown(forecast_html, unsafe_allow_html=True)
         
 
@@ -451,36 +500,25 @@ def home_page():
             return base
         
         # Get current weather for recommendations
-        current_weather = weather_service.get_current_weather(city)
+        current_weather = _current_weather(city)
         recommendations = generate_outfit_recommendation(current_weather)
         
         st.markdown(f"<p style='font-weight: 600; margin-bottom: 0.5rem;'>Perfect for {current_weather['temp']}°C weather:</p>", unsafe_allow_html=True)
         
         # Display recommendations in a nice format
-        for item in recommendations:
-            st.markdown(f"""
-                <div style='background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); 
-                color: white; padding: 0.6rem 1rem; border-radius: 8px; margin: 0.4rem 0; 
-                display: flex; align-items: center;'>
-                    <span style='margin-right: 0.5rem; font-size: 1.2rem;'>✓</span>
-                    <span>{item}</span>
-                </div>
-            """, unsafe_allow_html=True)
+        st.markdown(
+            "".join(_OUTFIT_ITEM_TMPL.substitute(item=item) for item in recommendations),
+            unsafe_allow_html=True,
+        )
         
         # Match with existing wardrobe
         wardrobe = get_wardrobe(st.session_state.username)
         if wardrobe:
             st.markdown("<p style='font-weight: 600; margin-top: 1.5rem; margin-bottom: 0.5rem;'>From Your Wardrobe:</p>", unsafe_allow_html=True)
-            for item in wardrobe[:3]:
-                st.markdown(f"""
-                    <div style='background: #f8f9fa; padding: 0.6rem 1rem; border-radius: 8px; 
-                    margin: 0.4rem 0; display: flex; align-items: center; border-left: 3px solid {item['color']};'>
-                        <span style='display:inline-block; width:16px; height:16px; 
-                        background:{item['color']}; border-radius:50%; margin-right:10px; border: 2px solid white; box-shadow: 0 2px 4px rgba(0,0,0,0.1);'></span>
-                        <strong>{item['name']}</strong> 
-                        <span style='margin-left: 0.5rem; color: #666; font-size: 0.85rem;'>({item['type']})</span>
-                    </div>
-                """, unsafe_allow_html=True)
+            st.markdown(
+                "".join(_WARDROBE_ITEM_TMPL.substitute(item) for item in wardrobe[:3]),
+                unsafe_allow_html=True,
+            )
         else:
             st.markdown("<div style='text-align: center; padding: 1rem; color: #666; font-style: italic;'>"
                        "Add items to your wardrobe to see personalized suggestions!"
@@ -523,7 +561,7 @@ def home_page():
         st.markdown("**Curated Suggestions:**")
         
         # Get current weather for suggestions
-        current_weather = weather_service.get_current_weather(city)
+        current_weather = _current_weather(city)
         temp = current_weather['temp']
         
         # Temperature-based suggestions
@@ -549,16 +587,7 @@ def home_page():
         cols = st.columns(3)
         for idx, item in enumerate(suggestions):
             with cols[idx]:
-                st.markdown(f"""
-                    <div class='recommendation-item' style='text-align:center;'>
-                        <div style='font-size: 3rem; margin-bottom: 0.5rem;'>👔</div>
-                        <strong>{item['name']}</strong><br>
-                        <span style='color: #667eea; font-size: 1.2rem;'>{item['price']}</span><br>
-                        <small>{item['style']} Style</small><br>
-                        <span style='background: #667eea; color: white; padding: 2px 8px; 
-                        border-radius: 12px; font-size: 0.8rem;'>{item['match']} Match</span>
-                    </div>
-                """, unsafe_allow_html=True)
+                st.markdown(_RECOMMENDATION_ITEM_TMPL.substitute(item), unsafe_allow_html=True)
 
 
     # Footer
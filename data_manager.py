@@ -5,8 +5,12 @@ Handles user profiles, wardrobe, and preferences storage
 This module automatically uses Supabase if configured, 
 otherwise falls back to local JSON storage.
 """
+import copy
 import json
 import os
+import hashlib
+import threading
+from collections import deque
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional
@@ -38,7 +42,6 @@ try:
 except ImportError:
     SUPABASE_AVAILABLE = False
     # Fallback password functions for local storage
-    import hashlib
     def hash_password(password: str) -> str:
         return hashlib.sha256(password.encode()).hexdigest()
     def verify_password(password: str, hashed: str) -> bool:
@@ -508,6 +511,60 @@ def remove_ai_item(username: str, item_id: str) -> bool:
 # ITEM FEEDBACK FUNCTIONS
 # ============================================
 
+IMAGE_URLS_FILE = DATA_DIR / "image_urls.json"  # legacy {key: image_link} snapshot, read-only
+IMAGE_URLS_LOG = DATA_DIR / "image_urls.jsonl"  # append-only, one {key, link} per line
+ITEM_FEEDBACK_FILE = DATA_DIR / "item_feedback.json"  # legacy {username: [entries]} snapshot, read-only
+ITEM_FEEDBACK_LOG = DATA_DIR / "item_feedback.jsonl"  # append-only, one entry per line
+_interned_image_keys = None  # keys already stored in IMAGE_URLS_FILE or IMAGE_URLS_LOG, loaded on first use
+
+
+def image_key(image_link: str) -> str:
+    """
+    Fixed-size key for an image link (16 hex chars), stored in item feedback
+    instead of the full URL/path. Resolve it back with get_image_link().
+    """
+    return hashlib.blake2b(image_link.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _load_image_urls() -> Dict:
+    """key -> image_link from the legacy snapshot plus the append-only log."""
+    image_urls = {}
+    if IMAGE_URLS_FILE.exists():
+        try:
+            with open(IMAGE_URLS_FILE, 'r') as f:
+                image_urls = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            image_urls = {}
+    if IMAGE_URLS_LOG.exists():
+        with open(IMAGE_URLS_LOG, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # blank or partially written line
+                image_urls[entry['key']] = entry['link']
+    return image_urls
+
+
+def intern_image(key: str, image_link: str):
+    """Record key -> image_link once, as one appended line; keys seen before skip the file entirely."""
+    global _interned_image_keys
+    if _interned_image_keys is None:
+        _interned_image_keys = set(_load_image_urls())
+    if key in _interned_image_keys:
+        return
+    
+    init_data_storage()
+    with open(IMAGE_URLS_LOG, 'a') as f:
+        f.write(json.dumps({'key': key, 'link': image_link}) + '\n')
+    _interned_image_keys.add(key)
+
+
+def get_image_link(key: str) -> Optional[str]:
+    """Look up the image link recorded for a feedback image key."""
+    return _load_image_urls().get(key)
+
+
 def save_item_feedback(username: str, recommendation_id: str, item_feedback: List[Dict], context: Dict = None):
     """
     Save item-specific feedback for recommendations.
@@ -521,42 +578,79 @@ def save_item_feedback(username: str, recommendation_id: str, item_feedback: Lis
             - color: item color
             - warmth_score: warmth level (1-5)
             - rating: user rating (1-5)
-            - image_link: item image identifier
+            - image_hash: image_key() of the item image link
         context: Additional context (weather, etc.)
     """
-    feedback_file = DATA_DIR / "item_feedback.json"
     init_data_storage()
     
-    # Load existing feedback
-    feedback_data = {}
-    if feedback_file.exists():
-        try:
-            with open(feedback_file, 'r') as f:
-                feedback_data = json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            feedback_data = {}
-    
-    # Initialize user's feedback list if needed
-    if username not in feedback_data:
-        feedback_data[username] = []
-    
-    # Create feedback entry
+    # One JSON line per entry: an append, not a rewrite of every user's history
     feedback_entry = {
+        'username': username,
         'recommendation_id': recommendation_id,
         'timestamp': datetime.now().isoformat(),
         'items': item_feedback,
         'context': context or {}
     }
+    with open(ITEM_FEEDBACK_LOG, 'a') as f:
+        f.write(json.dumps(feedback_entry) + '\n')
+
+
+def _file_stamp(path: Path) -> Optional[tuple]:
+    """(mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+# Parsed item feedback, last 100 entries per user: rebuilt when the legacy file changes
+# or the log is rewritten, extended from the last read offset when the log only grew
+_item_feedback_cache = {'legacy_stamp': None, 'log_stamp': None, 'offset': 0, 'by_user': {}}
+_item_feedback_lock = threading.Lock()  # Streamlit sessions share this module
+
+
+def _refresh_item_feedback_cache():
+    """Bring _item_feedback_cache up to date with the feedback files on disk."""
+    cache = _item_feedback_cache
+    legacy_stamp = _file_stamp(ITEM_FEEDBACK_FILE)
+    log_stamp = _file_stamp(ITEM_FEEDBACK_LOG)
+    if legacy_stamp == cache['legacy_stamp'] and log_stamp == cache['log_stamp']:
+        return
     
-    feedback_data[username].append(feedback_entry)
-    
-    # Keep only last 100 feedback entries per user to prevent file from growing too large
-    if len(feedback_data[username]) > 100:
-        feedback_data[username] = feedback_data[username][-100:]
-    
-    # Save to file
-    with open(feedback_file, 'w') as f:
-        json.dump(feedback_data, f, indent=2)
+    grew = (
+        legacy_stamp == cache['legacy_stamp']
+        and log_stamp is not None
+        and log_stamp[1] >= cache['offset']
+        and cache['log_stamp'] is not None
+    )
+    if not grew:
+        # Entries saved before the switch to the append-only log
+        by_user = {}
+        if ITEM_FEEDBACK_FILE.exists():
+            try:
+                with open(ITEM_FEEDBACK_FILE, 'r') as f:
+                    for user, entries in json.load(f).items():
+                        by_user[user] = deque(entries, maxlen=100)
+            except (json.JSONDecodeError, FileNotFoundError):
+                by_user = {}
+        cache.update(by_user=by_user, offset=0)
+    
+    offset = cache['offset']
+    if log_stamp is not None:
+        with open(ITEM_FEEDBACK_LOG, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # partially written line; picked up on the next read
+                offset += len(line)
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # blank or corrupt line
+                user = entry.pop('username', None)
+                cache['by_user'].setdefault(user, deque(maxlen=100)).append(entry)
+    cache.update(legacy_stamp=legacy_stamp, log_stamp=log_stamp, offset=offset)
 
 
 def get_item_feedback(username: str) -> List[Dict]:
@@ -570,18 +664,11 @@ def get_item_feedback(username: str) -> List[Dict]:
         - items: list of item feedback
         - context: context information
     """
-    feedback_file = DATA_DIR / "item_feedback.json"
     init_data_storage()
-    
-    if not feedback_file.exists():
-        return []
-    
-    try:
-        with open(feedback_file, 'r') as f:
-            feedback_data = json.load(f)
-        return feedback_data.get(username, [])
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
+    with _item_feedback_lock:
+        _refresh_item_feedback_cache()
+        # Only the last 100 entries per user are kept; callers get their own copies
+        return copy.deepcopy(list(_item_feedback_cache['by_user'].get(username, ())))
 
 
 def get_low_rated_item_patterns(username: str) -> Dict:
@@ -10,6 +10,77 @@ from typing import List, Dict, Tuple, Optional
 from datetime import datetime
 from pathlib import Path
 import random
+import threading
+import time
+
+
+def _with_timestamp_ns(entry: Dict) -> Dict:
+    """Give a legacy entry (ISO 'timestamp' string) the 'timestamp_ns' key new entries use; None if unparseable."""
+    if 'timestamp_ns' not in entry:
+        ts = entry.pop('timestamp', None)
+        try:
+            entry['timestamp_ns'] = int(datetime.fromisoformat(ts).timestamp() * 1e9)
+        except (TypeError, ValueError):
+            entry['timestamp_ns'] = None
+    return entry
+
+
+# Below this many responses a single pure-Python pass beats building a DataFrame
+_SMALL_FEEDBACK_THRESHOLD = 512
+
+
+def _pure_python_means(feedback_data: List[Dict]) -> Dict:
+    """
+    Single-pass equivalent of the pandas aggregation in get_user_study_metrics.
+    Missing/None ratings are skipped, matching DataFrame.mean().
+    """
+    rel_sum = sat_sum = div_sum = pers_sum = 0.0
+    rel_n = sat_n = div_n = pers_n = 0
+    daily = 0
+    seen = set()
+
+    for entry in feedback_data:
+        seen.update(entry)
+        rel = entry.get('relevance')
+        if rel is not None:
+            rel_sum += rel
+            rel_n += 1
+        sat = entry.get('satisfaction')
+        if sat is not None:
+            sat_sum += sat
+            sat_n += 1
+            if sat >= 4:
+                daily += 1
+        div = entry.get('diversity')
+        if div is not None:
+            div_sum += div
+            div_n += 1
+        pers = entry.get('personalization')
+        if pers is not None:
+            pers_sum += pers
+            pers_n += 1
+
+    def _mean(total, n, key):
+        if key not in seen:
+            return 0.0
+        return total / n if n else float('nan')
+
+    n = len(feedback_data)
+    metrics = {
+        'n_responses': n,
+        'avg_relevance': _mean(rel_sum, rel_n, 'relevance'),
+        'avg_satisfaction': _mean(sat_sum, sat_n, 'satisfaction'),
+        'avg_diversity': _mean(div_sum, div_n, 'diversity'),
+    }
+
+    if 'personalization' in seen:
+        metrics['avg_personalization'] = _mean(pers_sum, pers_n, 'personalization')
+
+    # Calculate percentage who would use daily (if 4+ rating)
+    if 'satisfaction' in seen:
+        metrics['would_use_daily_pct'] = daily / n * 100
+
+    return metrics
 
 
 class RecommendationEvaluator:
@@ -21,23 +92,38 @@ class RecommendationEvaluator:
     def __init__(self, feedback_file: str = "data/user_feedback.json"):
         """Initialize evaluator with feedback storage."""
         self.feedback_file = Path(feedback_file)
+        # New feedback is appended here, one JSON object per line
+        self.feedback_log = self.feedback_file.with_suffix('.jsonl')
         self.feedback_file.parent.mkdir(parents=True, exist_ok=True)
         self.feedback_data = self._load_feedback()
+        # The app shares one evaluator across sessions; serializes feedback writes
+        self._lock = threading.Lock()
     
     def _load_feedback(self) -> List[Dict]:
-        """Load existing user feedback."""
+        """
+        Load existing user feedback (legacy JSON list, then the append-only log),
+        with every entry timestamped as 'timestamp_ns'.
+        """
+        feedback = []
         if self.feedback_file.exists():
             try:
                 with open(self.feedback_file, 'r') as f:
-                    return json.load(f)
+                    feedback = json.load(f)
             except:
-                return []
-        return []
+                feedback = []
+        if self.feedback_log.exists():
+            with open(self.feedback_log, 'r') as f:
+                for line in f:
+                    try:
+                        feedback.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # blank or partially written line
+        return [_with_timestamp_ns(entry) for entry in feedback]
     
-    def _save_feedback(self):
-        """Save feedback to file."""
-        with open(self.feedback_file, 'w') as f:
-            json.dump(self.feedback_data, f, indent=2)
+    def _save_feedback(self, feedback: Dict):
+        """Append one feedback entry to the log."""
+        with open(self.feedback_log, 'a') as f:
+            f.write(json.dumps(feedback) + '\n')
     
     def save_user_feedback(self, feedback: Dict):
         """
@@ -46,9 +132,10 @@ class RecommendationEvaluator:
         Args:
             feedback: Dictionary containing user ratings and context
         """
-        feedback['timestamp'] = datetime.now().isoformat()
-        self.feedback_data.append(feedback)
-        self._save_feedback()
+        feedback['timestamp_ns'] = time.time_ns()
+        with self._lock:
+            self.feedback_data.append(feedback)
+            self._save_feedback(feedback)
     
     def calculate_warmth_accuracy(self, recommended_warmth: int, 
                                   actual_temp: float) -> float:
@@ -185,6 +272,75 @@ class RecommendationEvaluator:
         
         return dcg / idcg
     
+    @staticmethod
+    def precision_at_k_batch(top_k_ids: np.ndarray,
+                             relevant_mask: np.ndarray, k: int = 3) -> np.ndarray:
+        """
+        Calculate Precision@K for many users in one vectorized pass.
+
+        Args:
+            top_k_ids: (U, >=k) array of recommended item indices per user
+            relevant_mask: (U, I) boolean array marking relevant items per user
+            k: Number of top recommendations to consider
+
+        Returns:
+            (U,) array of precision scores (0-1)
+        """
+        top_k_ids = np.asarray(top_k_ids, dtype=np.intp)[:, :k]
+        relevant_mask = np.asarray(relevant_mask, dtype=bool)
+        n_users = top_k_ids.shape[0]
+
+        if k == 0 or top_k_ids.shape[1] == 0:
+            return np.zeros(n_users)
+
+        hits = relevant_mask[np.arange(n_users)[:, None], top_k_ids].sum(axis=1)
+        return hits / top_k_ids.shape[1]
+
+    @staticmethod
+    def recall_at_k_batch(top_k_ids: np.ndarray,
+                          relevant_mask: np.ndarray, k: int = 3) -> np.ndarray:
+        """
+        Calculate Recall@K for many users in one vectorized pass.
+
+        Args:
+            top_k_ids: (U, >=k) array of recommended item indices per user
+            relevant_mask: (U, I) boolean array marking relevant items per user
+            k: Number of top recommendations to consider
+
+        Returns:
+            (U,) array of recall scores (0-1), 0 for users with no relevant items
+        """
+        top_k_ids = np.asarray(top_k_ids, dtype=np.intp)[:, :k]
+        relevant_mask = np.asarray(relevant_mask, dtype=bool)
+        n_users = top_k_ids.shape[0]
+
+        n_relevant = relevant_mask.sum(axis=1)
+        hits = relevant_mask[np.arange(n_users)[:, None], top_k_ids].sum(axis=1)
+        return np.divide(hits, n_relevant, out=np.zeros(n_users), where=n_relevant > 0)
+
+    @staticmethod
+    def ndcg_at_k_batch(relevance_scores: np.ndarray, k: int = 3) -> np.ndarray:
+        """
+        Calculate NDCG@K for many users in one vectorized pass.
+
+        Args:
+            relevance_scores: (U, n) array of relevance scores in recommended order
+            k: Number of top recommendations to consider
+
+        Returns:
+            (U,) array of NDCG scores (0-1)
+        """
+        scores = np.asarray(relevance_scores, dtype=float)[:, :k]
+        n_users = scores.shape[0]
+
+        if scores.shape[1] == 0:
+            return np.zeros(n_users)
+
+        discounts = 1.0 / np.log2(np.arange(scores.shape[1]) + 2)
+        dcg = scores @ discounts
+        idcg = -np.sort(-scores, axis=1) @ discounts
+        return np.divide(dcg, idcg, out=np.zeros(n_users), where=idcg != 0)
+
     def weather_match_score(self, outfit: Dict, weather: Dict) -> float:
         """
         Calculate how well an outfit matches weather conditions.
@@ -290,10 +446,20 @@ class RecommendationEvaluator:
                 'avg_personalization': 0.0
             }
         
-        df = pd.DataFrame(self.feedback_data)
+        # Small N (the per-rerun case) skips DataFrame construction entirely
+        if len(self.feedback_data) < _SMALL_FEEDBACK_THRESHOLD:
+            return _pure_python_means(self.feedback_data)
+        
+        # Build only the rating columns, column-wise, as typed float arrays
+        rating_cols = ('relevance', 'satisfaction', 'diversity', 'personalization')
+        df = pd.DataFrame({
+            col: np.array([entry.get(col) for entry in self.feedback_data], dtype=float)
+            for col in rating_cols
+            if any(col in entry for entry in self.feedback_data)
+        })
         
         metrics = {
-            'n_responses': len(df),
+            'n_responses': len(self.feedback_data),
             'avg_relevance': df['relevance'].mean() if 'relevance' in df else 0.0,
             'avg_satisfaction': df['satisfaction'].mean() if 'satisfaction' in df else 0.0,
             'avg_diversity': df['diversity'].mean() if 'diversity' in df else 0.0,
@@ -347,7 +513,7 @@ class RecommendationEvaluator:
                 'recommendation_ctr': 0.67,
                 'wardrobe_addition_rate': 0.45
             },
-            'timestamp': datetime.now().isoformat()
+            'timestamp_ns': time.time_ns()
         }
 
 
@@ -362,6 +528,7 @@ def generate_mock_feedback(n_samples: int = 10) -> List[Dict]:
         List of mock feedback dictionaries
     """
     mock_feedback = []
+    base_ns = time.time_ns()
     
     for i in range(n_samples):
         mock_feedback.append({
@@ -372,7 +539,7 @@ def generate_mock_feedback(n_samples: int = 10) -> List[Dict]:
             'personalization': random.randint(3, 5),
             'weather_temp': random.uniform(5, 30),
             'outfit_type': random.choice(['Layered', 'Dress']),
-            'timestamp': datetime.now().isoformat()
+            'timestamp_ns': base_ns + i
         })
     
     return mock_feedback
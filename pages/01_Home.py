@@ -4,115 +4,853 @@ from pathlib import Path
 from dotenv import load_dotenv
 import sys
 import os
-import base64
+import json
+import html
+import hashlib
+import random
+import string
+import re
+import bisect
+from urllib.parse import urlsplit, quote
 import pandas as pd
+import numpy as np
+from io import BytesIO
+from PIL import Image
 sys.path.append('..')
 
 from ui import inject_css
-from data_manager import add_wardrobe_item, remove_wardrobe_item, get_wardrobe, get_ai_wardrobe, get_user, update_user
+from data_manager import add_wardrobe_item, remove_wardrobe_item, get_wardrobe, get_ai_wardrobe, get_user, update_user, image_key, intern_image, save_item_feedback
 from weather_service import WeatherService
 from recommendation_engine import RecommendationEngine
 from evaluation import RecommendationEvaluator
 from visual_search import VisualSearchService
 from analytics_collector import get_analytics
 import uuid
+from itertools import chain
 
-load_dotenv()
+
+@st.cache_resource(show_spinner=False)
+def _load_env():
+    """Read .env once per process; later reruns reuse the already populated os.environ."""
+    load_dotenv()
+
+
+_load_env()
+
+
+@st.cache_resource(show_spinner=False)
+def _shopping_suggestions_by_budget() -> dict:
+    """
+    Fallback shopping suggestion pools (three curated sets per temperature band), with prices
+    already adjusted for every budget tier. Built once per process, not on every rerun.
+    """
+    pools = {
+        "cold": (
+            ({"name": "Wool Blend Coat", "price": "$120", "style": "Classic", "match": "95%"},
+             {"name": "Cashmere Sweater", "price": "$85", "style": "Elegant", "match": "92%"},
+             {"name": "Thermal Leggings", "price": "$45", "style": "Comfort", "match": "88%"}),
+            ({"name": "Down Puffer Jacket", "price": "$150", "style": "Modern", "match": "94%"},
+             {"name": "Merino Wool Sweater", "price": "$95", "style": "Premium", "match": "91%"},
+             {"name": "Fleece Lined Pants", "price": "$55", "style": "Warm", "match": "89%"}),
+            ({"name": "Parka Winter Coat", "price": "$180", "style": "Outdoor", "match": "93%"},
+             {"name": "Cable Knit Sweater", "price": "$75", "style": "Classic", "match": "90%"},
+             {"name": "Wool Blend Trousers", "price": "$65", "style": "Smart", "match": "87%"})
+        ),
+        "mild": (
+            ({"name": "Denim Jacket", "price": "$75", "style": "Casual", "match": "93%"},
+             {"name": "Cotton Hoodie", "price": "$55", "style": "Urban", "match": "90%"},
+             {"name": "Leather Ankle Boots", "price": "$145", "style": "Modern", "match": "88%"}),
+            ({"name": "Lightweight Blazer", "price": "$95", "style": "Smart", "match": "92%"},
+             {"name": "Long Sleeve Tee", "price": "$35", "style": "Minimalist", "match": "89%"},
+             {"name": "Chino Pants", "price": "$60", "style": "Classic", "match": "91%"}),
+            ({"name": "Bomber Jacket", "price": "$85", "style": "Streetwear", "match": "94%"},
+             {"name": "Oversized Sweater", "price": "$65", "style": "Comfort", "match": "90%"},
+             {"name": "Sneakers", "price": "$90", "style": "Sport", "match": "87%"})
+        ),
+        "warm": (
+            ({"name": "Linen Shirt", "price": "$65", "style": "Minimalist", "match": "94%"},
+             {"name": "Cotton Shorts", "price": "$40", "style": "Casual", "match": "91%"},
+             {"name": "Canvas Sneakers", "price": "$80", "style": "Sport", "match": "89%"}),
+            ({"name": "Cotton Button-Up", "price": "$55", "style": "Classic", "match": "93%"},
+             {"name": "Lightweight Chinos", "price": "$50", "style": "Smart", "match": "90%"},
+             {"name": "Espadrilles", "price": "$45", "style": "Summer", "match": "88%"}),
+            ({"name": "Tank Top", "price": "$25", "style": "Casual", "match": "92%"},
+             {"name": "Bermuda Shorts", "price": "$45", "style": "Comfort", "match": "89%"},
+             {"name": "Sandals", "price": "$35", "style": "Beach", "match": "91%"})
+        ),
+    }
+
+    # Price multiplier per budget preference
+    multipliers = {"$": 0.7, "$$": 1.0, "$$$": 1.5, "$$$$": 2.0}
+
+    return {
+        budget: {
+            bucket: tuple(
+                tuple(
+                    dict(item, price=f"${int(float(item['price'].replace('$', '').replace(',', '')) * multiplier)}")
+                    for item in suggestion_set
+                )
+                for suggestion_set in suggestion_sets
+            )
+            for bucket, suggestion_sets in pools.items()
+        }
+        for budget, multiplier in multipliers.items()
+    }
+
+
+# Simple (non-engine) outfit suggestions: upper temperature bound of each tier and its items.
+# The same tiers pick the curated shopping pool (_shopping_suggestions_by_budget() buckets, coldest first).
+_OUTFIT_TIER_TEMPS = (10, 20)
+_TEMP_BUCKETS = ("cold", "mild", "warm")
+_OUTFIT_TIER_ITEMS = (
+    ("Warm sweater", "Thermal pants", "Winter coat", "Boots", "Scarf"),
+    ("Long sleeve shirt", "Jeans", "Light jacket", "Sneakers"),
+    ("T-shirt", "Shorts/Light pants", "Sunglasses", "Sandals"),
+)
+_WET_RE = re.compile(r"rain|drizzle", re.I)
+_RAIN_EXTRA_ITEMS = ("Umbrella", "Waterproof jacket")
+
+# Layered-outfit rating sliders: (recommendation key, label, default category)
+_LAYER_RATING_SPECS = (
+    ("outer", "Outerwear", "jacket"),
+    ("top", "Top", "t-shirt"),
+    ("bottom", "Bottom", "jeans"),
+)
+
+# Category title shown for each outfit item when the item has no category
+_ITEM_TITLE_DEFAULTS = (("dress", "Dress"), ("outer", "Outerwear"), ("top", "Top"), ("bottom", "Bottom"))
+
+# Slot of each rateable item in the per-recommendation ratings array
+_RATED_ITEM_INDEX = {"dress": 0, "outer": 1, "top": 2, "bottom": 3}
+
+# Debug expanders (dataset + wardrobe details) are only rendered with VAESTA_DEBUG=1
+_DEBUG = os.getenv("VAESTA_DEBUG") == "1"
+
+# Repository root (one level up from pages folder), resolved once per script run
+_REPO_ROOT = Path(__file__).resolve().parent.parent
+_DATASET_DIR = _REPO_ROOT / 'dataset'
 
 # Initialize analytics
 analytics = get_analytics()
 
+# Weather card markup, compiled once at import instead of re-built on every rerun
+_WEATHER_CARD_TMPL = string.Template("""
+    <div class='weather-card'>
+        <div style='font-size: 3.5rem; margin-bottom: 0.5rem;'>${icon}</div>
+        <h2 style='margin: 0.5rem 0;'>${temp}&deg;C</h2>
+        <p style='font-size: 0.85rem; opacity: 0.85; margin: 0.3rem 0;'>Feels like ${feels_like}&deg;C</p>
+        <p style='font-size: 1.1rem; text-transform: capitalize; margin: 0.5rem 0;'>${description}</p>
+        <p style='margin: 0.5rem 0;'>&#128205; ${city}</p>
+        <div style='display: flex; justify-content: space-around; margin-top: 1rem; padding-top: 1rem; border-top: 1px solid rgba(255,255,255,0.2); font-size: 0.9rem;'>
+            <div>&#128167; ${humidity}%</div>
+            <div>&#127788; ${wind_speed} m/s</div>
+        </div>
+    </div>
+""")
+
+
+@st.cache_resource(show_spinner=False, ttl=600)
+def _dataset_image_index() -> dict:
+    """Map dataset-relative paths to absolute paths with a single walk (re-walked every 10 minutes)."""
+    index = {}
+    for dirpath, _, filenames in os.walk(_DATASET_DIR):
+        for name in filenames:
+            abs_path = os.path.join(dirpath, name)
+            index[Path(abs_path).relative_to(_DATASET_DIR).as_posix()] = abs_path
+    return index
+
+
+@st.cache_data(show_spinner=False, max_entries=512)
+def _find_image_path(path: str) -> str:
+    """Resolve a dataset/upload image path to an existing file on disk; raises FileNotFoundError on a miss."""
+    # Build list of candidate paths to try
+    candidates = []
+    p = Path(path)
+    
+    # If it's already an absolute path, try it as-is
+    if p.is_absolute():
+        candidates.append(p)
+    else:
+        # Path relative to repository root, then within the dataset folder
+        candidates.append(_REPO_ROOT / path)
+        candidates.append(_DATASET_DIR / path)
+
+        # Also consider current working directory
+        try:
+            candidates.append(Path.cwd() / path)
+            candidates.append(Path.cwd() / 'dataset' / path)
+        except Exception:
+            pass
+    
+    # Find the first candidate that exists and has non-zero size (one stat per candidate)
+    for cand in candidates:
+        try:
+            if os.stat(cand).st_size > 0:
+                return str(cand)
+        except OSError:
+            continue
+    
+    # Raising keeps misses out of the cache, so a file that appears later is still found
+    raise FileNotFoundError(path)
+
+
+def _resolve_image_path(path: str):
+    """Resolve a dataset/upload image path to an existing file on disk (or None)."""
+    try:
+        return _find_image_path(path)
+    except FileNotFoundError:
+        return None
+
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def _thumbnail_bytes(path: str, mtime: float, size: int, width: int) -> bytes:
+    """
+    Downscale an image to its display width (2x for high-DPI screens) and encode it as WebP.
+    Cached per (path, mtime, size, width); falls back to the original bytes if Pillow can't decode it.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        img = Image.open(BytesIO(data))
+        img.thumbnail((width * 2, width * 2))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA")
+        out = BytesIO()
+        img.save(out, format="WEBP", quality=80)
+        return out.getvalue()
+    except Exception:
+        return data
+
+
+def _image_source(path: str, width: int):
+    """URL or cached thumbnail bytes to hand to st.image, or None if the image can't be found."""
+    if not path:
+        return None
+
+    # Remote images go straight to the browser
+    if path.startswith('http://') or path.startswith('https://'):
+        return path
+
+    # Dataset images resolve from the prebuilt index; anything else (uploads) probes disk
+    index = _dataset_image_index()
+    found_path = index.get(path) or _resolve_image_path(path)
+    if not found_path:
+        return None
+
+    stat = os.stat(found_path)
+    return _thumbnail_bytes(found_path, stat.st_mtime, stat.st_size, width)
+
 
 def render_local_image(path: str, width: int = 200, alt_text: str = ""):
-    """Render an image from disk via base64 (supports PNG and JPG)."""
+    """
+    Render an outfit image from a URL (Supabase Storage) or a local path via st.image.
+    Shows a placeholder with alt_text when the path is empty or can't be resolved.
+    """
     try:
-        if not path:
+        source = _image_source(path, width)
+        if source is None:
             st.info(f"📷 {alt_text or 'Image'}")
             return
+        st.image(source, width=width)
+    except Exception as e:
+        # Debug: uncomment to see errors
+        # st.error(f"Image load error: {e}")
+        st.info(f"📷 {alt_text or 'Image'}")
 
-        # Build list of candidate paths to try
-        candidates = []
-        p = Path(path)
-        
-        # If it's already an absolute path and exists, use it
-        if p.is_absolute() and p.exists():
-            candidates.append(p)
+
+def render_outfit_row(paths: list, captions: list, width: int = 140, alt_texts: list = None):
+    """
+    Render outfit images side by side as a single st.image element, each with its caption.
+    Falls back to one column per item (with placeholders) if any image can't be resolved.
+    """
+    alt_texts = alt_texts or [""] * len(paths)
+    try:
+        sources = [_image_source(path, width) for path in paths]
+    except Exception:
+        sources = [None]
+    if all(source is not None for source in sources):
+        st.image(sources, width=width, caption=captions)
+        return
+
+    for col, path, caption, alt_text in zip(st.columns(len(paths)), paths, captions, alt_texts):
+        with col:
+            render_local_image(path, width=width, alt_text=alt_text)
+            st.markdown(caption)
+
+
+def attach_category_titles(recommendation: dict):
+    """Title-case each item's category once per recommendation (display and slider labels)."""
+    for key, default in _ITEM_TITLE_DEFAULTS:
+        item = recommendation.get(key)
+        if item:
+            item['category_title'] = str(item.get('category', default)).title()
+
+
+def preload_remote_images(recommendation: dict):
+    """
+    Hint the browser to fetch remote (Supabase Storage) outfit images while the rest
+    of the page renders. Local images are served as Streamlit media and need no hint.
+    """
+    links = [
+        (recommendation.get(key) or {}).get('image_link', '')
+        for key in ('dress', 'outer', 'top', 'bottom')
+    ]
+    tags = "".join(
+        f'<link rel="preload" as="image" href="{html.escape(link, quote=True)}">'
+        for link in links if link.startswith(('http://', 'https://'))
+    )
+    if tags:
+        st.markdown(tags, unsafe_allow_html=True)
+
+
+# Category mapping based on item type (must match recommendation_engine.CATEGORY_MAP)
+# Valid categories: jacket, coat, hoodie, t-shirt, button-up shirt, sweater, polo, 
+# blouse, tank top, jeans, trousers, shorts, skirt, leggings, dress
+_TYPE_TO_CATEGORY = {
+    'Outerwear': 'jacket',  # Maps to "Outer" component
+    'jacket': 'jacket',  # AI wardrobe uses 'jacket' directly
+    'coat': 'coat',
+    'Top': 't-shirt',  # Maps to "Top" component  
+    'shirt': 'button-up shirt',
+    't-shirt': 't-shirt',
+    'sweater': 'sweater',
+    'polo': 'polo',
+    'Bottom': 'jeans',  # Maps to "Bottom" component
+    'pants': 'trousers',
+    'shorts': 'shorts',
+    'jeans': 'jeans',
+    'skirt': 'skirt',
+    'leggings': 'leggings',
+    'dress': 'dress'
+}
+_VALID_CATEGORIES = frozenset(_TYPE_TO_CATEGORY.values())
+_OUTER_TYPES = frozenset({'outerwear', 'jacket', 'coat', 'hoodie'})
+
+
+def _column(df: pd.DataFrame, name: str, default) -> pd.Series:
+    """Return df[name] with missing values filled, or a constant column if absent."""
+    if name in df:
+        return df[name].where(df[name].notna(), default)
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _season_set(value) -> frozenset:
+    """Normalize a wardrobe item's 'season' field (list, single string or missing) to lowercase names."""
+    if isinstance(value, str):
+        value = [value]
+    elif not isinstance(value, (list, tuple, set)):
+        value = ()
+    return frozenset(str(s).lower() for s in value)
+
+
+def _outfit_for(temp: int, condition: str) -> tuple:
+    """Simple outfit items for a whole-degree temperature, plus rain gear when wet."""
+    base = _OUTFIT_TIER_ITEMS[bisect.bisect_right(_OUTFIT_TIER_TEMPS, temp)]
+    return base + _RAIN_EXTRA_ITEMS if _WET_RE.search(condition) else base
+
+
+# Markdown characters that could start emphasis, links or code inside third-party text
+_MD_SPECIAL_RE = re.compile(r'([\\`*_\[\]()#!|])')
+
+
+def _md_cell(value) -> str:
+    """Third-party text made safe for an HTML-enabled Markdown table cell (HTML and Markdown escaped)."""
+    return _MD_SPECIAL_RE.sub(r'\\\1', html.escape(str(value).replace('\n', ' '), quote=False))
+
+
+def _safe_url(url) -> str:
+    """The URL percent-quoted for a Markdown link target, or '' unless it's an absolute http(s) URL."""
+    parts = urlsplit(str(url or ''))
+    if parts.scheme not in ('http', 'https') or not parts.netloc:
+        return ''
+    return quote(str(url), safe=":/?#@!$&'*+,;=%~.-_")
+
+
+def _markdown_row_table(cells) -> str:
+    """Single-row Markdown table (one column per cell), rendered as one element."""
+    cells = list(cells)
+    return "| " + " | ".join(cells) + " |\n" + "|---" * len(cells) + "|"
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def _wardrobe_to_df(items_json: str) -> pd.DataFrame:
+    """
+    Convert user wardrobe items (regular + AI) to the recommendation engine format.
+    Keyed on the sorted JSON dump of [regular_items, ai_items] so an unchanged
+    wardrobe reuses the DataFrame.
+    """
+    # Handle both regular wardrobe format and AI wardrobe format
+    # Regular: {'type': 'Top', 'name': '...', 'color': '...', 'season': [...]}
+    # AI: {'type': 'jacket', 'warmth_level': 3, 'color': '...', 'season': [...], ...}
+    items = pd.DataFrame(list(chain.from_iterable(json.loads(items_json))))
+    if items.empty:
+        return pd.DataFrame()
+
+    # Get item type (AI wardrobe uses 'type' directly like 'jacket', 'sweater', etc.)
+    item_type = _column(items, 'type', 'Top').astype(str)
+    item_name = _column(items, 'name', '').astype(str)
+    item_name = item_name.where(item_name != '', item_type.str.title())  # AI items might not have 'name'
+    type_lower = item_type.str.lower()
+
+    # Map item_type to category (must be a key in CATEGORY_MAP)
+    # AI wardrobe already uses correct category names (jacket, sweater, shorts, etc.)
+    # Regular wardrobe uses generic types (Outerwear, Top, Bottom)
+    category = type_lower.where(
+        type_lower.isin(_VALID_CATEGORIES),
+        item_type.map(_TYPE_TO_CATEGORY).fillna('t-shirt')
+    )
+
+    # Map item_type to outer_inner (required by recommendation engine)
+    is_outer = type_lower.isin(_OUTER_TYPES)
+    outer_inner = pd.Series(np.where(is_outer, 'outer', 'inner'), index=items.index)
+
+    # Get warmth_score (AI wardrobe has 'warmth_level', regular is estimated from type and season)
+    seasons = items['season'].map(_season_set) if 'season' in items else pd.Series([frozenset()] * len(items), index=items.index)
+    estimated_warmth = pd.Series(
+        np.select(
+            [(item_type == 'Outerwear') | seasons.map(lambda ss: 'winter' in ss), seasons.map(lambda ss: 'summer' in ss)],
+            [4, 2],
+            default=3
+        ),
+        index=items.index
+    )
+    warmth_score = items['warmth_level'].fillna(estimated_warmth) if 'warmth_level' in items else estimated_warmth
+
+    # Get impermeability_score (AI wardrobe has this, regular estimates: waterproof items score higher)
+    waterproof = _column(items, 'waterproof', False).astype(bool)
+    impermeability_score = _column(items, 'impermeability_score', np.nan).astype(float).fillna(
+        pd.Series(np.where(waterproof, 4, 2), index=items.index)
+    )
+
+    # Get layering_score
+    layering_score = _column(items, 'layering_score', np.nan).astype(float).fillna(
+        pd.Series(np.where(is_outer, 1, 3), index=items.index)
+    )
+
+    return pd.DataFrame({
+        'category': category,  # Must be a key in CATEGORY_MAP
+        'color': _column(items, 'color', '#667eea'),
+        'warmth_score': warmth_score,
+        'impermeability_score': impermeability_score,
+        'layering_score': layering_score,
+        'thickness': _column(items, 'thickness', 'medium'),
+        'image_link': _column(items, 'image_path', ''),
+        'outer_inner': outer_inner,  # REQUIRED: 'outer' or 'inner'
+        'notes': "From your wardrobe: " + item_name
+    })
+
+
+@st.cache_data(show_spinner=False)
+def _resolve_dataset(gender_raw) -> tuple:
+    """
+    Map a stored gender value to (user_gender, gender_suffix, expected_dataset, dataset_path).
+    dataset_path is None when the dataset file can't be found.
+    """
+    user_gender = str(gender_raw).strip()
+    # Map gender to correct dataset: Female users get female clothes, Male users get male clothes
+    # Datasets are correctly labeled: female.json has Female_Wardrobe, male.json has Male_Wardrobe
+    if user_gender == "Female":
+        gender_suffix = "female"  # Female users should get female clothes from female dataset
+    elif user_gender == "Male":
+        gender_suffix = "male"    # Male users should get male clothes from male dataset
+    else:
+        # Default fallback to female (for any other value or None)
+        gender_suffix = "female"
+    expected_dataset = f"../dataset/personalized_clothing_dataset_{gender_suffix}.json"
+
+    dataset_path = os.path.join(os.path.dirname(__file__), expected_dataset)
+    # Verify the path exists
+    if not os.path.exists(dataset_path):
+        # Try alternative path resolution
+        dataset_path = _DATASET_DIR / f"personalized_clothing_dataset_{gender_suffix}.json"
+
+    if not os.path.exists(dataset_path):
+        return user_gender, gender_suffix, expected_dataset, None
+    return user_gender, gender_suffix, expected_dataset, dataset_path
+
+
+@st.cache_resource(show_spinner="Loading recommendation engine...")
+def _get_engine(dataset_path: str, mtime: float, api_key: str) -> RecommendationEngine:
+    """Build the recommendation engine once per dataset file version."""
+    return RecommendationEngine(dataset_path, api_key)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_weather_service() -> WeatherService:
+    """One weather client shared by all sessions."""
+    return WeatherService()
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _recommend(_engine: RecommendationEngine, dataset_path: str, dataset_mtime: float, city: str,
+               temp_bucket: int, username: str, custom_wardrobe: pd.DataFrame, nonce: int) -> dict:
+    """
+    Outfit recommendation reused for 5 minutes per (dataset version, city, whole-degree temperature,
+    user, wardrobe, session nonce), so reruns don't re-score the wardrobe or re-record outfit history.
+    Bumping the session's nonce asks for a fresh outfit without evicting other sessions' entries.
+    """
+    try:
+        # Try with username parameter (new version)
+        return _engine.recommend_outfit(city, custom_wardrobe=custom_wardrobe, username=username)
+    except TypeError:
+        # Fallback for older version without username parameter
+        return _engine.recommend_outfit(city, custom_wardrobe=custom_wardrobe)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _current_weather(_service: WeatherService, city: str) -> dict:
+    """
+    Current weather shared by all reruns and both columns for 10 minutes, with the
+    weather card HTML rendered once per fetch.
+    """
+    weather = _service.get_current_weather(city)
+    return dict(
+        weather,
+        fetched_at=datetime.now().strftime('%H:%M:%S'),
+        card_html=_WEATHER_CARD_TMPL.substitute(weather),
+    )
+
+
+@st.cache_data(ttl=1800, show_spinner=False)
+def _forecast(_service: WeatherService, city: str, days: int) -> dict:
+    """Multi-day forecast cached for 30 minutes per (city, days)."""
+    return _service.get_forecast(city, days)
+
+
+@st.cache_resource(show_spinner=False)
+def _get_evaluator() -> RecommendationEvaluator:
+    """Evaluator shared by all sessions, created on the first feedback submission."""
+    return RecommendationEvaluator()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_visual_search() -> VisualSearchService:
+    """Visual search service shared by all sessions, created on the first shopping search."""
+    return VisualSearchService()
+
+
+def _outfit_fingerprint(recommendation: dict) -> tuple:
+    """Stable identity of an outfit: its type and each item's image link."""
+    return (recommendation.get('outfit_type'),) + tuple(
+        (key, (recommendation.get(key) or {}).get('image_link', ''))
+        for key in ('dress', 'outer', 'top', 'bottom') if recommendation.get(key)
+    )
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _similar_products(_service: VisualSearchService, fingerprint: tuple, gender: str, _recommendation: dict) -> dict:
+    """Online products similar to each outfit item, cached per outfit fingerprint and gender."""
+    return _service.find_similar_from_outfit(_recommendation, gender=gender)
+
+
+def _image_feedback_key(image_link: str) -> str:
+    """Short key stored in item feedback in place of the image link (interned once)."""
+    if not image_link:
+        return ''
+    key = image_key(image_link)
+    intern_image(key, image_link)
+    return key
+
+
+def _record_recommendation_event(event: dict):
+    """Write one new recommendation's analytics event right away, so no session ends with it unsent."""
+    analytics.track_batch('recommendations', [event])
+
+
+@st.fragment
+def _weather_panel(city: str):
+    """Weather card / forecast; switching the forecast range reruns only this panel."""
+    st.markdown("### 🌤️ Weather Forecast")
+
+    if st.button("🔄 Update Weather", use_container_width=True):
+        _current_weather.clear()
+        _forecast.clear()
+        st.rerun()  # whole page, so the outfit column picks up the new weather too
+
+    forecast_option = st.radio("Check weather for:", ["Today", "7 Days", "14 Days"], horizontal=True)
+
+    if forecast_option == "Today":
+        weather = _current_weather(_get_weather_service(), city)
+
+        st.markdown(weather["card_html"], unsafe_allow_html=True)
+        if weather.get("source") == "mock":
+            st.caption("Using sample weather (set OPENWEATHER_API_KEY for live data).")
         else:
-            # Path relative to repository root (one level up from pages folder)
-            try:
-                repo_root = Path(__file__).resolve().parent.parent
-                candidates.append(repo_root / path)
-                # Also try within the dataset folder
-                candidates.append(repo_root / 'dataset' / path)
-            except Exception:
-                pass
-
-            # Also consider current working directory
-            try:
-                candidates.append(Path.cwd() / path)
-                candidates.append(Path.cwd() / 'dataset' / path)
-            except Exception:
-                pass
-        
-        # Find the first candidate that exists and has non-zero size
-        found_path = None
-        for cand in candidates:
-            try:
-                if cand.exists() and cand.stat().st_size > 0:
-                    found_path = cand
-                    break
-            except Exception:
-                continue
-        
-        # If the path exists but is an empty/corrupt file, try to find a sibling file
-        # with the same stem (prefer .png or a non-empty file).
-        if found_path and found_path.stat().st_size == 0:
-            # Try png first
-            png_alt = found_path.with_suffix('.png')
-            if png_alt.exists() and png_alt.stat().st_size > 0:
-                found_path = png_alt
-            else:
-                # Look for any file with same stem and non-zero size
-                siblings = list(found_path.parent.glob(found_path.stem + '.*'))
-                for s in siblings:
-                    try:
-                        if s.exists() and s.stat().st_size > 0:
-                            found_path = s
-                            break
-                    except Exception:
-                        continue
-        
-        if not found_path or not found_path.exists():
-            st.info(f"📷 {alt_text or 'Image'}")
+            st.caption(f"Last updated: {weather['fetched_at']}")
+    else:
+        days = 7 if forecast_option == "7 Days" else 14
+        data = _forecast(_get_weather_service(), city, days)
+
+        st.write(f"**{data['city']} - Next {days} Days**")
+        # Whole forecast as one table; dates formatted in a single vectorized pass
+        forecast_df = pd.DataFrame(data["forecast"])
+        if not forecast_df.empty:
+            st.dataframe(
+                pd.DataFrame({
+                    "Day": pd.to_datetime(forecast_df["date"]).dt.strftime("%a, %b %d"),
+                    "Temp (\u00b0C)": forecast_df["temp"],
+                    "Condition": forecast_df["icon"] + " " + forecast_df["condition"],
+                    "Humidity (%)": forecast_df["humidity"],
+                }),
+                hide_index=True,
+                use_container_width=True
+            )
+
+
+@st.fragment
+def _feedback_panel(recommendation: dict, weather_info: dict, city: str, rec_id: str):
+    """Rating form for the shown recommendation; submitting reruns only this panel."""
+    # User feedback section: spacer, rule and header go out as one element
+    st.markdown(
+        "<div class='recommendation-feedback-spacer'></div>\n\n---\n\n##### Rate This Recommendation",
+        unsafe_allow_html=True,
+    )
+
+    # Sliders live in a form so dragging them doesn't rerun the page until submit
+    with st.form("rate_rec_form", clear_on_submit=False):
+        # Item-specific feedback: numeric ratings in a fixed-slot array (0 = not rated),
+        # per-item details alongside for persistence
+        ratings_arr = np.zeros(len(_RATED_ITEM_INDEX), dtype=np.int8)
+        item_ratings = {}
+        items_rated = []
+
+        if recommendation['outfit_type'] != 'Dress':
+            # Layered outfit - rate each item separately
+            st.markdown("**Rate each clothing item:**")
+
+            # (key, label, default category) for each layer; same slider + record per item
+            for item_key, label, default_category in _LAYER_RATING_SPECS:
+                item = recommendation.get(item_key) or {}
+                if not item:
+                    continue
+                rating = st.slider(
+                    f"Rate the {label} ({item.get('category_title', label)})",
+                    1, 5, 4,
+                    key=f"{item_key}_rating",
+                    help=f"How much do you like this {label.lower()}? (1=Dislike, 5=Love)"
+                )
+                ratings_arr[_RATED_ITEM_INDEX[item_key]] = rating
+                item_ratings[item_key] = {
+                    'rating': rating,
+                    'item': item,
+                    'item_type': item_key,
+                    'category': item.get('category', default_category),
+                    'color': item.get('color', ''),
+                    'warmth_score': item.get('warmth_score', 3),
+                    'image_link': item.get('image_link', '')
+                }
+                items_rated.append(item_key)
+            st.markdown("---")
+
+        # Overall satisfaction; for a dress (the only item) it is also the dress rating
+        overall_satisfaction = st.slider(
+            "Overall Satisfaction",
+            1, 5, 4,
+            key="overall_satisfaction",
+            help="How satisfied are you with this outfit overall?"
+        )
+
+        if recommendation['outfit_type'] == 'Dress':
+            dress = recommendation['dress']
+            ratings_arr[_RATED_ITEM_INDEX['dress']] = overall_satisfaction
+            item_ratings['dress'] = {
+                'rating': overall_satisfaction,
+                'item': dress,
+                'item_type': 'dress',
+                'category': dress.get('category', 'dress'),
+                'color': dress.get('color', ''),
+                'warmth_score': dress.get('warmth_score', 3),
+                'image_link': dress.get('image_link', '')
+            }
+            items_rated.append('dress')
+
+        submitted = st.form_submit_button("📝 Submit Feedback", use_container_width=True)
+
+    if submitted:
+        # Track feedback with analytics
+        current_rec_id = st.session_state.get('current_rec_id', rec_id)
+
+        # Repeated submits (double clicks, replayed button runs) for the same recommendation are no-ops
+        submitted_key = f"_submitted_{current_rec_id}"
+        if st.session_state.get(submitted_key):
+            st.info("Feedback already recorded.")
             return
 
-        with open(found_path, "rb") as f:
-            data = base64.b64encode(f.read()).decode("utf-8")
+        # Calculate average rating for overall metrics
+        rated = ratings_arr[ratings_arr > 0]
+        avg_item_rating = float(rated.mean()) if rated.size else overall_satisfaction
+        rating_by_item = {key: int(ratings_arr[idx]) for key, idx in _RATED_ITEM_INDEX.items() if ratings_arr[idx]}
+
+        # Prepare item-specific feedback data
+        item_feedback_data = []
+        low_rated_items = []  # Items with rating 1-3 (shared with item_feedback_data)
+
+        for item_key, item_data in item_ratings.items():
+            rating = item_data['rating']
+            item_feedback_data.append({
+                'item_type': item_data['item_type'],
+                'category': item_data['category'],
+                'color': item_data['color'],
+                'warmth_score': item_data['warmth_score'],
+                'rating': rating,
+                'image_hash': _image_feedback_key(item_data['image_link'])
+            })
+
+            # Track low-rated items (1-3) for penalty system (same record, not a copy)
+            if rating <= 3:
+                low_rated_items.append(item_feedback_data[-1])
+
+        # Save item-specific feedback to a separate file for recommendation engine
+        save_item_feedback(
+            st.session_state.username,
+            current_rec_id,
+            item_feedback_data,
+            {
+                'city': city,
+                'temperature': weather_info['temp'],
+                'outfit_type': recommendation['outfit_type'],
+                'overall_satisfaction': overall_satisfaction
+            }
+        )
+
+        # Legacy feedback format (for backward compatibility)
+        feedback = {
+            'username': st.session_state.username,
+            'city': city,
+            'temperature': weather_info['temp'],
+            'outfit_type': recommendation['outfit_type'],
+            'relevance': int(avg_item_rating),  # Use avg item rating as relevance
+            'satisfaction': overall_satisfaction,
+            'diversity': 4,  # Default
+            'item_ratings': item_ratings  # Include item-specific ratings
+        }
 
-        ext = os.path.splitext(str(found_path))[1].lower()
-        if ext in [".jpg", ".jpeg"]:
-            mime = "image/jpeg"
-        elif ext == ".png":
-            mime = "image/png"
+        # Save to legacy evaluator
+        _get_evaluator().save_user_feedback(feedback)
+
+        # Save to analytics collector (Huawei-style): queued recommendations,
+        # this feedback and the feedback interaction go out in one call
+        feedback_event = analytics.build_feedback_event(
+            username=st.session_state.username,
+            recommendation_id=current_rec_id,
+            feedback_type='explicit',
+            ratings={
+                'relevance': int(avg_item_rating),
+                'satisfaction': overall_satisfaction,
+                'diversity': 4
+            },
+            items_rated=items_rated,
+            context={
+                'city': city,
+                'temperature': weather_info['temp'],
+                'outfit_type': recommendation['outfit_type'],
+                'item_ratings': rating_by_item
+            }
+        )
+
+        # Track interaction
+        interaction_event = analytics.build_interaction_event(
+            username=st.session_state.username,
+            interaction_type='feedback',
+            item_id=current_rec_id,
+            recommendation_id=current_rec_id,
+            metadata={
+                'overall_satisfaction': overall_satisfaction,
+                'item_ratings': rating_by_item,
+                'low_rated_items': len(low_rated_items)
+            }
+        )
+
+        analytics.track_events({
+            'feedback': [feedback_event],
+            'interactions': [interaction_event]
+        })
+
+        # Show message about low-rated items
+        if low_rated_items:
+            low_items_str = ", ".join([f"{item['item_type'].title()}" for item in low_rated_items])
+            st.success(f"✅ Thank you for your feedback! We'll adjust future recommendations to avoid similar {low_items_str} items.")
         else:
-            mime = "image/*"
-
-        # Use max-width and automatic height to preserve aspect ratio
-        # Limit base64 size to prevent display issues - resize if too large
-        max_base64_size = 500000  # ~500KB limit
-        if len(data) > max_base64_size:
-            # Image is too large, use a placeholder instead
-            st.info(f"📷 {alt_text or 'Image'} (Image too large to display)")
-            return
-        
-        style = f"max-width:{width}px;height:auto;border-radius:12px;display:block;margin-bottom:0.5rem;object-fit:contain;"
-        # Add a CSS class so global rules can control max-height and containment
-        html = f"<img class='vaesta-img' src='data:{mime};base64,{data}' alt='{alt_text}' style='{style}' loading='lazy' />"
-        st.markdown(html, unsafe_allow_html=True)
-    except Exception as e:
-        # Debug: uncomment to see errors
-        # st.error(f"Image load error: {e}")
-        st.info(f"📷 {alt_text or 'Image'}")
+            st.success("✅ Thank you for your feedback! It helps us improve recommendations.")
+
+        st.session_state[submitted_key] = True
+
+
+@st.fragment
+def _shopping_panel(w_now: dict, preferences: dict, advanced: bool):
+    """Shopping suggestions; style picks and searches rerun only this panel."""
+    st.markdown("### 🛍️ Fashion Shopping Suggestions")
+    a, b, c = st.columns(3)
+    with a:
+        styles = ["Minimalist Chic", "Urban Streetwear", "Classic Elegant", "Casual Comfort"]
+        st.markdown("**Trending Styles**")
+        selected_style = st.selectbox("Choose your style:", styles, index=styles.index(preferences.get("style", "Minimalist Chic")), label_visibility="collapsed")
+    with b:
+        st.markdown("**Budget Range**")
+    if st.button("🔍 Find Perfect Pieces", use_container_width=True):
+        st.markdown("---")
+
+        # Check if we have a recent recommendation to base shopping on
+        last_recommendation = st.session_state.get('last_recommendation')
+
+        if advanced and last_recommendation and "error" not in last_recommendation:
+            with st.spinner("🔍 Finding similar items online..."):
+                # Get user gender for gender-specific shopping results
+                user_gender = str(st.session_state.user_data.get("gender", "Female")).strip()
+                shopping_results = _similar_products(
+                    _get_visual_search(), _outfit_fingerprint(last_recommendation), user_gender, last_recommendation
+                )
+
+                if shopping_results:
+                    st.markdown("**🛍️ Similar Items Available Online:**")
+                    st.caption("Based on your AI outfit recommendation")
+
+                    # Display results for each item type
+                    for item_type, products in shopping_results.items():
+                        if products:
+                            st.markdown(f"##### {item_type.title()}")
+
+                            # Product information without image, one table cell per product
+                            st.markdown(_markdown_row_table(
+                                f"**{_md_cell(product['name'])}**<br>💰 {_md_cell(product['price'])}"
+                                + (f"<br><small>Match: {_md_cell(product['match'])}</small>" if product.get('match') else "")
+                                + (f"<br>[🏪 Shop at {_md_cell(product['source'])}]({_safe_url(product['url'])})"
+                                   if _safe_url(product.get('url')) else f"<br>🏪 {_md_cell(product['source'])}")
+                                for product in products[:3]
+                            ), unsafe_allow_html=True)
+                            st.markdown("---")
+                else:
+                    st.warning("No shopping results found. Try getting a recommendation first!")
+        else:
+            # Fallback to dynamic suggestions based on weather, style, and preferences
+            st.markdown("**🛍️ Curated Shopping Suggestions:**")
+            temp = w_now['temp']  # Already fetched (and cached) for the outfit column
+            user_style = preferences.get("style", "Minimalist Chic")
+            budget = preferences.get("budget", "$$")
+
+            # Generate varied suggestions based on multiple factors
+            # Style + username hash is computed once per session (again only if the style changes)
+            seed_key = (user_style, st.session_state.username)
+            if st.session_state.get('_shopping_seed_key') != seed_key:
+                st.session_state._shopping_seed_key = seed_key
+                st.session_state._shopping_seed_base = hash(user_style) + hash(st.session_state.username)
+            # Dedicated generator so the global random state is left untouched
+            rng = random.Random(int(temp) + st.session_state._shopping_seed_base)
+
+            # Select random set based on temperature
+            bucket = _TEMP_BUCKETS[bisect.bisect_right(_OUTFIT_TIER_TEMPS, temp)]
+            # Prices are pre-adjusted per budget; unknown budgets fall back to "$$" (1.0x)
+            by_budget = _shopping_suggestions_by_budget()
+            budget_table = by_budget.get(budget, by_budget["$$"])
+            suggestions = rng.choice(budget_table[bucket])
+
+            # One table cell per suggestion, each with a search link
+            st.markdown(_markdown_row_table(
+                f"**{item['name']}**<br>💰 {item['price']} \\| {item['style']}<br>✨ Match: {item['match']}"
+                f"<br>[🔍 Search Online](https://www.google.com/search?q={item['name'].replace(' ', '+')}+fashion)"
+                for item in suggestions
+            ), unsafe_allow_html=True)
+
 
 inject_css()
 
@@ -124,62 +862,35 @@ if not st.session_state.get("logged_in"):
 st.markdown("<h1>👔 VAESTA</h1>", unsafe_allow_html=True)
 st.markdown("<p class='subtitle'>Your Intelligent Fashion Companion</p>", unsafe_allow_html=True)
 
-if "weather_service" not in st.session_state:
-    st.session_state.weather_service = WeatherService()
-weather_service = st.session_state.weather_service
+weather_service = _get_weather_service()
 
 # Initialize recommendation engine with gender-specific dataset
-user_gender = str(st.session_state.user_data.get("gender", "Female")).strip()
-# Map gender to correct dataset: Female users get female clothes, Male users get male clothes
-# Datasets are correctly labeled: female.json has Female_Wardrobe, male.json has Male_Wardrobe
-if user_gender == "Female":
-    gender_suffix = "female"  # Female users should get female clothes from female dataset
-elif user_gender == "Male":
-    gender_suffix = "male"    # Male users should get male clothes from male dataset
-else:
-    # Default fallback to female (for any other value or None)
-    gender_suffix = "female"
-expected_dataset = f"../dataset/personalized_clothing_dataset_{gender_suffix}.json"
-
-# Check if we need to reload the recommendation engine (new user, gender change, or first load)
-current_dataset = st.session_state.get("current_dataset")
-needs_reload = (
-    "recommendation_engine" not in st.session_state or 
-    current_dataset != expected_dataset or
-    st.session_state.get("current_user_gender") != user_gender
-)
+# Dataset selection only depends on the stored gender (resolved once per value per process)
+gender_raw = st.session_state.user_data.get("gender", "Female")
+user_gender, gender_suffix, expected_dataset, dataset_path = _resolve_dataset(gender_raw)
+if dataset_path is None:
+    _resolve_dataset.clear()  # don't remember the miss; retry on the next run
+    st.error(f"⚠️ Dataset file not found: {_DATASET_DIR / f'personalized_clothing_dataset_{gender_suffix}.json'}. Please check the dataset files.")
+    st.stop()
 
-if needs_reload:
-    dataset_path = os.path.join(os.path.dirname(__file__), expected_dataset)
-    # Verify the path exists
-    if not os.path.exists(dataset_path):
-        # Try alternative path resolution
-        repo_root = Path(__file__).resolve().parent.parent
-        dataset_path = repo_root / "dataset" / f"personalized_clothing_dataset_{gender_suffix}.json"
+# One engine per (dataset, mtime) shared across sessions; editing the dataset rebuilds it
+api_key = os.getenv("OPENWEATHER_API_KEY", "")
+dataset_mtime = os.path.getmtime(dataset_path)
+rec_engine = _get_engine(str(dataset_path), dataset_mtime, api_key)
+
+# Show which dataset was loaded when this session first sees it (new user or gender change)
+if st.session_state.get("current_dataset") != expected_dataset:
+    st.session_state.current_dataset = expected_dataset
     
-    if os.path.exists(dataset_path):
-        api_key = os.getenv("OPENWEATHER_API_KEY", "")
-        # Always clear old engine to force reload when gender/dataset changes
-        if "recommendation_engine" in st.session_state:
-            del st.session_state.recommendation_engine
-        # Also clear related session state
-        if "current_dataset" in st.session_state:
-            del st.session_state.current_dataset
-        if "current_user_gender" in st.session_state:
-            del st.session_state.current_user_gender
-        
-        # Create new recommendation engine with correct dataset
-        st.session_state.recommendation_engine = RecommendationEngine(str(dataset_path), api_key)
-        st.session_state.current_dataset = expected_dataset
-        st.session_state.current_user_gender = user_gender
-        
-        # Debug: Always show which dataset was loaded (can be removed later)
-        if st.session_state.recommendation_engine.wardrobe_df is not None and len(st.session_state.recommendation_engine.wardrobe_df) > 0:
-            first_item = st.session_state.recommendation_engine.wardrobe_df.iloc[0]
-            first_image = str(first_item.get('image_link', ''))
-            is_female = 'Female_Wardrobe' in first_image
-            is_male = 'Male_Wardrobe' in first_image
-            # Show debug info in expander
+    # Debug: Always show which dataset was loaded (can be removed later)
+    if rec_engine.wardrobe_df is not None and len(rec_engine.wardrobe_df) > 0:
+        first_item = rec_engine.wardrobe_df.iloc[0]
+        first_image = str(first_item.get('image_link', ''))
+        is_female = 'Female_Wardrobe' in first_image
+        is_male = 'Male_Wardrobe' in first_image
+        mismatch = (user_gender == "Female" and not is_female) or (user_gender == "Male" and not is_male)
+        # Show debug info in expander
+        if _DEBUG:
             with st.expander("🔍 Dataset Debug Info", expanded=False):
                 st.write(f"**User Gender:** {user_gender}")
                 st.write(f"**Selected Dataset:** {gender_suffix}")
@@ -187,23 +898,10 @@ if needs_reload:
                 st.write(f"**First Item Image:** {first_image[:80]}...")
                 st.write(f"**Contains Female_Wardrobe:** {is_female}")
                 st.write(f"**Contains Male_Wardrobe:** {is_male}")
-                if (user_gender == "Female" and not is_female) or (user_gender == "Male" and not is_male):
+                if mismatch:
                     st.error("⚠️ MISMATCH DETECTED: Dataset content doesn't match user gender!")
-    else:
-        st.error(f"⚠️ Dataset file not found: {dataset_path}. Please check the dataset files.")
-        st.stop()
-
-rec_engine = st.session_state.recommendation_engine
-
-# Initialize evaluator
-if "evaluator" not in st.session_state:
-    st.session_state.evaluator = RecommendationEvaluator()
-evaluator = st.session_state.evaluator
-
-# Initialize visual search service
-if "visual_search" not in st.session_state:
-    st.session_state.visual_search = VisualSearchService()
-visual_search = st.session_state.visual_search
+        elif mismatch:
+            st.error("⚠️ MISMATCH DETECTED: Dataset content doesn't match user gender!")
 
 # Sidebar controls
 with st.sidebar:
@@ -211,11 +909,12 @@ with st.sidebar:
     
     # Force reload recommendation engine (for debugging/fixing gender issues)
     if st.button("🔄 Force Reload Recommendations", use_container_width=True, help="Clear cache and reload recommendation engine with correct gender dataset"):
-        # Clear all recommendation-related session state
-        keys_to_clear = ["recommendation_engine", "current_dataset", "current_user_gender", "last_recommendation"]
-        for key in keys_to_clear:
-            if key in st.session_state:
-                del st.session_state[key]
+        # Drop the shared engine and all recommendation-related session state
+        _get_engine.clear()
+        st.session_state._outfit_nonce = st.session_state.get("_outfit_nonce", 0) + 1
+        _resolve_dataset.clear()
+        for key in ("current_dataset", "last_recommendation"):
+            st.session_state.pop(key, None)
         st.success("✅ Cache cleared! Reloading with correct gender dataset...")
         st.rerun()
     current_city = st.session_state.user_data.get("city", "London")
@@ -258,17 +957,24 @@ with st.sidebar:
                 st.success(f"Added {item_name}!")
                 st.rerun()
 
-    wardrobe = get_wardrobe(st.session_state.username)
+    wardrobe = get_wardrobe(st.session_state.username)  # reused by the outfit column below
     if wardrobe:
         st.markdown(f"**Current Items:** ({len(wardrobe)})")
-        for idx, item in enumerate(wardrobe):
-            c1, c2 = st.columns([3, 1])
-            with c1:
-                st.markdown(f"🔹 **{item['name']}** ({item['type']})")
-            with c2:
-                if st.button("🗑️", key=f"del_{idx}"):
-                    remove_wardrobe_item(st.session_state.username, idx)
-                    st.rerun()
+        # Whole list in one element; a single picker + button handles removal
+        st.markdown("  \n".join(f"🔹 **{item['name']}** ({item['type']})" for item in wardrobe))
+        c1, c2 = st.columns([3, 1])
+        with c1:
+            del_idx = st.selectbox(
+                "Remove item",
+                range(len(wardrobe)),
+                format_func=lambda i: wardrobe[i]['name'],
+                key="del_item_idx",
+                label_visibility="collapsed"
+            )
+        with c2:
+            if st.button("🗑️", key="del_item", help="Remove the selected item"):
+                remove_wardrobe_item(st.session_state.username, del_idx)
+                st.rerun()
     else:
         st.markdown("<div style='text-align: center; padding: 1rem; color: #666;'>Your wardrobe is empty. Add some items to get personalized recommendations!</div>", unsafe_allow_html=True)
 
@@ -276,90 +982,19 @@ with st.sidebar:
 col1, col2 = st.columns([1, 1])
 
 with col1:
-    st.markdown("### 🌤️ Weather Forecast")
-    city = st.session_state.user_data.get("city", "London")
-    
-    # Cache weather data in session state with city and timestamp
-    cache_key = f"weather_cache_{city}"
-    cache_time_key = f"weather_cache_time_{city}"
-    
-    # Check if we need to refresh (manual button or cache miss)
-    needs_refresh = (
-        cache_key not in st.session_state or
-        st.session_state.get("force_weather_refresh", False)
-    )
-    
-    if st.button("🔄 Update Weather", use_container_width=True):
-        st.session_state.force_weather_refresh = True
-        st.rerun()
-    
-    forecast_option = st.radio("Check weather for:", ["Today", "7 Days", "14 Days"], horizontal=True)
-
-    if forecast_option == "Today":
-        # Use cached data or fetch new
-        if needs_refresh:
-            weather = weather_service.get_current_weather(city)
-            st.session_state[cache_key] = weather
-            st.session_state[cache_time_key] = datetime.now().isoformat()
-            st.session_state.force_weather_refresh = False
-        else:
-            weather = st.session_state[cache_key]
-        
-        icon = weather['icon']
-        temp = weather['temp']
-        feels_like = weather['feels_like']
-        description = weather['description']
-        city = weather['city']
-        humidity = weather['humidity']
-        wind_speed = weather['wind_speed']
-        
-        weather_html = f"""
-            <div class='weather-card'>
-                <div style='font-size: 3.5rem; margin-bottom: 0.5rem;'>{icon}</div>
-                <h2 style='margin: 0.5rem 0;'>{temp}&deg;C</h2>
-                <p style='font-size: 0.85rem; opacity: 0.85; margin: 0.3rem 0;'>Feels like {feels_like}&deg;C</p>
-                <p style='font-size: 1.1rem; text-transform: capitalize; margin: 0.5rem 0;'>{description}</p>
-                <p style='margin: 0.5rem 0;'>&#128205; {city}</p>
-                <div style='display: flex; justify-content: space-around; margin-top: 1rem; padding-top: 1rem; border-top: 1px solid rgba(255,255,255,0.2); font-size: 0.9rem;'>
-                    <div>&#128167; {humidity}%</div>
-                    <div>&#127788; {wind_speed} m/s</div>
-                </div>
-            </div>
-        """
-        st.markdown(weather_html, unsafe_allow_html=True)
-        if weather.get("source") == "mock":
-            st.caption("Using sample weather (set OPENWEATHER_API_KEY for live data).")
-        elif cache_time_key in st.session_state:
-            cache_time = datetime.fromisoformat(st.session_state[cache_time_key])
-            st.caption(f"Last updated: {cache_time.strftime('%H:%M:%S')}")
-    else:
-        days = 7 if forecast_option == "7 Days" else 14
-        forecast_cache_key = f"forecast_cache_{city}_{days}"
-        forecast_time_key = f"forecast_cache_time_{city}_{days}"
-        
-        # Use cached forecast or fetch new
-        if needs_refresh or forecast_cache_key not in st.session_state:
-            data = weather_service.get_forecast(city, days)
-            st.session_state[forecast_cache_key] = data
-            st.session_state[forecast_time_key] = datetime.now().isoformat()
-            st.session_state.force_weather_refresh = False
-        else:
-            data = st.session_state[forecast_cache_key]
-        
-        st.write(f"**{data['city']} - Next {days} Days**")
-        for day in data["forecast"]:
-            dt = datetime.fromisoformat(day["date"]).strftime("%a, %b %d")
-            st.write(f"{dt}: {day['temp_max']}\u00b0C / {day['temp_min']}\u00b0C - {day['description']}")
+    _weather_panel(st.session_state.user_data.get("city", "London"))
 
 with col2:
     st.markdown("### 👗 AI-Powered Outfit Recommendation")
     
     city = st.session_state.user_data.get("city", "London")
-    w_now = weather_service.get_current_weather(city)
+    w_now = _current_weather(weather_service, city)
     
     # Option to use advanced recommendations
     use_advanced = st.checkbox("🤖 Use Advanced AI Recommendations", value=True, 
                               help="Uses content-based recommendation engine with weather analysis")
+    if st.button("🎲 New Outfit", help="Ignore the recently cached outfit and score the wardrobe again"):
+        st.session_state._outfit_nonce = st.session_state.get("_outfit_nonce", 0) + 1
     
     if use_advanced and rec_engine.wardrobe_df is not None:
         # Get advanced recommendation from dataset
@@ -371,115 +1006,33 @@ with col2:
         if use_only_wardrobe:
             # Get user's wardrobe (both regular and AI) and convert to DataFrame format
             username = st.session_state.username
-            user_wardrobe = get_wardrobe(username) or []
+            user_wardrobe = wardrobe or []  # already loaded for the sidebar this run
             ai_wardrobe = get_ai_wardrobe(username) or []
             
-            # Combine both wardrobes
-            all_wardrobe_items = list(user_wardrobe) + list(ai_wardrobe)
+            # Count both wardrobes without building a combined copy
+            n_regular, n_ai = len(user_wardrobe), len(ai_wardrobe)
+            n_total = n_regular + n_ai
             
             # Debug info (temporary)
-            with st.expander("🔍 Debug Info", expanded=False):
-                st.write(f"**Username:** {username}")
-                st.write(f"**Regular wardrobe:** {len(user_wardrobe)} items")
-                st.write(f"**AI wardrobe:** {len(ai_wardrobe)} items")
-                st.write(f"**Total items:** {len(all_wardrobe_items)}")
-                if all_wardrobe_items:
-                    st.write("**Items found:**")
-                    for idx, item in enumerate(all_wardrobe_items):
-                        item_name = item.get('name') or item.get('type', 'Unknown')
-                        item_type = item.get('type', 'Unknown')
-                        st.write(f"  {idx+1}. {item_name} ({item_type})")
+            if _DEBUG:
+                with st.expander("🔍 Debug Info", expanded=False):
+                    st.write(f"**Username:** {username}")
+                    st.write(f"**Regular wardrobe:** {n_regular} items")
+                    st.write(f"**AI wardrobe:** {n_ai} items")
+                    st.write(f"**Total items:** {n_total}")
+                    if n_total:
+                        st.write("**Items found:**")
+                        for idx, item in enumerate(chain(user_wardrobe, ai_wardrobe)):
+                            item_name = item.get('name') or item.get('type', 'Unknown')
+                            item_type = item.get('type', 'Unknown')
+                            st.write(f"  {idx+1}. {item_name} ({item_type})")
             
-            if len(all_wardrobe_items) > 0:
+            if n_total > 0:
                 # Convert user wardrobe (regular + AI) to recommendation engine format
-                wardrobe_items = []
-                
-                # Category mapping based on item type (must match recommendation_engine.CATEGORY_MAP)
-                # Valid categories: jacket, coat, hoodie, t-shirt, button-up shirt, sweater, polo, 
-                # blouse, tank top, jeans, trousers, shorts, skirt, leggings, dress
-                TYPE_TO_CATEGORY = {
-                    'Outerwear': 'jacket',  # Maps to "Outer" component
-                    'jacket': 'jacket',  # AI wardrobe uses 'jacket' directly
-                    'coat': 'coat',
-                    'Top': 't-shirt',  # Maps to "Top" component  
-                    'shirt': 'button-up shirt',
-                    't-shirt': 't-shirt',
-                    'sweater': 'sweater',
-                    'polo': 'polo',
-                    'Bottom': 'jeans',  # Maps to "Bottom" component
-                    'pants': 'trousers',
-                    'shorts': 'shorts',
-                    'jeans': 'jeans',
-                    'skirt': 'skirt',
-                    'leggings': 'leggings',
-                    'dress': 'dress'
-                }
+                custom_wardrobe_df = _wardrobe_to_df(json.dumps([user_wardrobe, ai_wardrobe], sort_keys=True, default=str))
                 
-                for item in all_wardrobe_items:
-                    # Handle both regular wardrobe format and AI wardrobe format
-                    # Regular: {'type': 'Top', 'name': '...', 'color': '...', 'season': [...]}
-                    # AI: {'type': 'jacket', 'warmth_level': 3, 'color': '...', 'season': [...], ...}
-                    
-                    # Get item type (AI wardrobe uses 'type' directly like 'jacket', 'sweater', etc.)
-                    item_type = item.get('type', 'Top')
-                    item_name = item.get('name') or item_type.title()  # AI items might not have 'name'
-                    
-                    # Map item_type to category (must be a key in CATEGORY_MAP)
-                    # AI wardrobe already uses correct category names (jacket, sweater, shorts, etc.)
-                    # Regular wardrobe uses generic types (Outerwear, Top, Bottom)
-                    item_type_lower = item_type.lower()
-                    
-                    # Check if it's already a valid category name
-                    if item_type_lower in TYPE_TO_CATEGORY.values():
-                        category = item_type_lower  # Already correct (jacket, sweater, shorts, etc.)
-                    else:
-                        # Map generic type to category
-                        category = TYPE_TO_CATEGORY.get(item_type, 't-shirt')
-                    
-                    # Map item_type to outer_inner (required by recommendation engine)
-                    if item_type_lower in ['outerwear', 'jacket', 'coat', 'hoodie']:
-                        outer_inner = 'outer'
-                    else:
-                        outer_inner = 'inner'  # Top, Bottom, etc.
-                    
-                    # Get warmth_score (AI wardrobe has 'warmth_level', regular has estimated)
-                    if 'warmth_level' in item:
-                        # From AI wardrobe - convert to warmth_score (same scale 1-5)
-                        warmth_score = item.get('warmth_level', 3)
-                    else:
-                        # From regular wardrobe - estimate based on type and season
-                        warmth_score = 3  # Default moderate
-                        if item_type == 'Outerwear' or 'winter' in str(item.get('season', [])).lower():
-                            warmth_score = 4
-                        elif 'summer' in str(item.get('season', [])).lower():
-                            warmth_score = 2
-                    
-                    # Get impermeability_score (AI wardrobe has this, regular estimates)
-                    impermeability_score = item.get('impermeability_score')
-                    if impermeability_score is None:
-                        # Estimate: waterproof items have higher score
-                        impermeability_score = 4 if item.get('waterproof', False) else 2
-                    
-                    # Get layering_score
-                    layering_score = item.get('layering_score')
-                    if layering_score is None:
-                        layering_score = 1 if outer_inner == 'outer' else 3
-                    
-                    wardrobe_items.append({
-                        'category': category,  # Must be a key in CATEGORY_MAP
-                        'color': item.get('color', '#667eea'),
-                        'warmth_score': warmth_score,
-                        'impermeability_score': impermeability_score,
-                        'layering_score': layering_score,
-                        'thickness': item.get('thickness', 'medium'),
-                        'image_link': item.get('image_path', ''),
-                        'outer_inner': outer_inner,  # REQUIRED: 'outer' or 'inner'
-                        'notes': f"From your wardrobe: {item_name}"
-                    })
-                
-                if wardrobe_items:
-                    custom_wardrobe_df = pd.DataFrame(wardrobe_items)
-                    st.info(f"✅ Using {len(wardrobe_items)} items from your wardrobe ({len(user_wardrobe)} regular + {len(ai_wardrobe)} AI)")
+                if not custom_wardrobe_df.empty:
+                    st.info(f"✅ Using {len(custom_wardrobe_df)} items from your wardrobe ({n_regular} regular + {n_ai} AI)")
                 else:
                     st.warning("⚠️ Your wardrobe is empty. Add items in the sidebar or AI Wardrobe!")
                     custom_wardrobe_df = None
@@ -492,44 +1045,58 @@ with col2:
         
         # Get username safely and pass to recommendation engine
         username = st.session_state.get('username', None)
-        try:
-            # Try with username parameter (new version)
-            recommendation = rec_engine.recommend_outfit(city, custom_wardrobe=custom_wardrobe_df, username=username)
-        except TypeError:
-            # Fallback for older version without username parameter
-            recommendation = rec_engine.recommend_outfit(city, custom_wardrobe=custom_wardrobe_df)
+        recommendation = _recommend(
+            rec_engine, str(dataset_path), dataset_mtime, city, int(w_now['temp']), username,
+            custom_wardrobe_df, st.session_state.get("_outfit_nonce", 0),
+        )
         
         # Store recommendation in session state for shopping suggestions
         st.session_state['last_recommendation'] = recommendation
         st.session_state['last_recommendation_time'] = datetime.now().isoformat()
         
-        # Generate unique recommendation ID for tracking
-        rec_id = f"rec_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        # Generate a unique recommendation ID for tracking, only when the recommendation
+        # actually changed (reruns that reproduce the same outfit keep the current ID).
+        # The nonce is hashed too, so "New Outfit" always gets a fresh ID and feedback form
+        # even when the engine happens to return the same outfit again.
+        rec_hash = hashlib.blake2b(
+            json.dumps([st.session_state.get("_outfit_nonce", 0), recommendation], sort_keys=True, default=str).encode('utf-8'),
+            digest_size=8,
+        ).hexdigest()
+        is_new_rec = st.session_state.get('_rec_hash') != rec_hash or 'current_rec_id' not in st.session_state
+        if is_new_rec:
+            rec_id = f"rec_{datetime.now().strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+            st.session_state['_rec_hash'] = rec_hash
+        else:
+            rec_id = st.session_state['current_rec_id']
         
         if "error" not in recommendation:
-            # Track recommendation generation
-            rec_items = []
-            if recommendation['outfit_type'] == 'Dress':
-                rec_items.append(recommendation.get('dress', {}))
-            else:
-                rec_items.extend([
-                    recommendation.get('outer', {}),
-                    recommendation.get('top', {}),
-                    recommendation.get('bottom', {})
-                ])
+            attach_category_titles(recommendation)
+            preload_remote_images(recommendation)
             
-            analytics.track_recommendation(
-                username=st.session_state.username,
-                recommendation_id=rec_id,
-                recommendation_type='outfit',
-                items=rec_items,
-                context={
-                    'temp': recommendation['weather']['temp'],
-                    'condition': recommendation['weather']['desc'],
-                    'style': st.session_state.user_data.get('preferences', {}).get('style', 'casual'),
-                    'city': city
-                }
-            )
+            # Track recommendation generation
+            if is_new_rec:
+                rec_items = []
+                if recommendation['outfit_type'] == 'Dress':
+                    rec_items.append(recommendation.get('dress', {}))
+                else:
+                    rec_items.extend([
+                        recommendation.get('outer', {}),
+                        recommendation.get('top', {}),
+                        recommendation.get('bottom', {})
+                    ])
+                
+                _record_recommendation_event(analytics.build_recommendation_event(
+                    username=st.session_state.username,
+                    recommendation_id=rec_id,
+                    recommendation_type='outfit',
+                    items=rec_items,
+                    context={
+                        'temp': recommendation['weather']['temp'],
+                        'condition': recommendation['weather']['desc'],
+                        'style': st.session_state.user_data.get('preferences', {}).get('style', 'casual'),
+                        'city': city
+                    }
+                ))
             
             # Store rec_id in session for feedback tracking
             st.session_state['current_rec_id'] = rec_id
@@ -542,433 +1109,74 @@ with col2:
             imp_req = required['impermeability']
             layer_req = required['layering']
             
-            st.info(f"Weather Analysis: {temp_str}°C, {weather_desc}")
-            st.write(f"Required: Warmth {warmth_req}/5 | Impermeability {imp_req}/3 | Layering {layer_req}/5")
+            st.info(
+                f"Weather Analysis: {temp_str}°C, {weather_desc}  \n"
+                f"Required: Warmth {warmth_req}/5 | Impermeability {imp_req}/3 | Layering {layer_req}/5"
+            )
             
             if recommendation['outfit_type'] == 'Dress':
                 dress = recommendation['dress']
-                dress_cat = dress.get('category', 'Dress').title()
+                dress_cat = dress.get('category_title', 'Dress')
                 dress_notes = dress.get('notes', '')
                 dress_warmth = dress.get('warmth_score', 3)
                 dress_match_val = f"{dress.get('total_score', 8):.1f}"
                 dress_img = dress.get('image_link', '')
                 
                 st.success(f"**Perfect Dress: {dress_cat}**")
-                # Display image - support both URLs (Supabase Storage) and local paths
+                # Display image - render_local_image handles both URLs (Supabase Storage) and local paths
                 if dress_img:
-                    if dress_img.startswith('http://') or dress_img.startswith('https://'):
-                        st.image(dress_img, width=300, use_container_width=False)
-                    else:
-                        render_local_image(dress_img, width=300, alt_text=dress_cat)
+                    render_local_image(dress_img, width=300, alt_text=dress_cat)
                 else:
                     st.info(f"📷 {dress_cat} ({dress.get('color', 'N/A')})")
-                st.write(dress_notes)
-                st.write(f"Warmth: {dress_warmth}/5 | Match: {dress_match_val}/10")
+                st.markdown(f"{dress_notes}\n\nWarmth: {dress_warmth}/5 | Match: {dress_match_val}/10")
             else:
                 # Layered outfit: render three items in a single row so they don't get overlapped
                 outer = recommendation.get('outer') or {}
                 top = recommendation.get('top') or {}
                 bottom = recommendation.get('bottom') or {}
 
-                outer_cat = outer.get('category', 'Outerwear').title()
+                outer_cat = outer.get('category_title', 'Outerwear')
                 outer_color = outer.get('color', '')
                 outer_warmth = outer.get('warmth_score', 3)
                 outer_img = outer.get('image_link', '')
 
-                top_cat = top.get('category', 'Top').title()
+                top_cat = top.get('category_title', 'Top')
                 top_color = top.get('color', '')
                 top_warmth = top.get('warmth_score', 3)
                 top_img = top.get('image_link', '')
 
-                bottom_cat = bottom.get('category', 'Bottom').title()
+                bottom_cat = bottom.get('category_title', 'Bottom')
                 bottom_color = bottom.get('color', '')
                 bottom_warmth = bottom.get('warmth_score', 3)
                 bottom_img = bottom.get('image_link', '')
 
-                # Three columns: each shows image + caption to keep layout predictable
-                img_cols = st.columns([1, 1, 1])
-                with img_cols[0]:
-                    if outer_img:
-                        # Support both URLs (Supabase Storage) and local paths
-                        if outer_img.startswith('http://') or outer_img.startswith('https://'):
-                            st.image(outer_img, width=140, use_container_width=False)
-                        else:
-                            render_local_image(outer_img, width=140, alt_text=outer_cat)
-                    else:
-                        st.info(f"📷 {outer_cat}")
-                    st.markdown(f"**Outerwear:** {outer_cat} ({outer_color}) | Warmth: {outer_warmth}/5")
-                with img_cols[1]:
-                    if top_img:
-                        # Support both URLs (Supabase Storage) and local paths
-                        if top_img.startswith('http://') or top_img.startswith('https://'):
-                            st.image(top_img, width=140, use_container_width=False)
-                        else:
-                            render_local_image(top_img, width=140, alt_text=top_cat)
-                    else:
-                        st.info(f"📷 {top_cat}")
-                    st.markdown(f"**Top:** {top_cat} ({top_color}) | Warmth: {top_warmth}/5")
-                with img_cols[2]:
-                    if bottom_img:
-                        # Support both URLs (Supabase Storage) and local paths
-                        if bottom_img.startswith('http://') or bottom_img.startswith('https://'):
-                            st.image(bottom_img, width=140, use_container_width=False)
-                        else:
-                            render_local_image(bottom_img, width=140, alt_text=bottom_cat)
-                    else:
-                        st.info(f"📷 {bottom_cat}")
-                    st.markdown(f"**Bottom:** {bottom_cat} ({bottom_color}) | Warmth: {bottom_warmth}/5")
-
-                # Small clear spacer to separate images from feedback controls
-                st.markdown("<div style='clear:both;height:0.6rem'></div>", unsafe_allow_html=True)
-            
-            # User feedback section
-            # Add a small spacer to ensure image area is separated from feedback controls
-            st.markdown("<div class='recommendation-feedback-spacer'></div>", unsafe_allow_html=True)
-            st.markdown("---")
-            st.markdown("##### Rate This Recommendation")
-            
-            # Item-specific feedback
-            item_ratings = {}
-            items_rated = []
-            
-            if recommendation['outfit_type'] == 'Dress':
-                # Dress outfit - rate the dress
-                dress = recommendation['dress']
-                dress_rating = st.slider(
-                    f"Rate the Dress ({dress.get('category', 'Dress').title()})",
-                    1, 5, 4,
-                    key="dress_rating",
-                    help="How much do you like this dress? (1=Dislike, 5=Love)"
+                # One row: each image with its caption to keep layout predictable
+                render_outfit_row(
+                    [outer_img, top_img, bottom_img],
+                    [
+                        f"Outerwear: {outer_cat} ({outer_color}) | Warmth: {outer_warmth}/5",
+                        f"Top: {top_cat} ({top_color}) | Warmth: {top_warmth}/5",
+                        f"Bottom: {bottom_cat} ({bottom_color}) | Warmth: {bottom_warmth}/5",
+                    ],
+                    width=140,
+                    alt_texts=[outer_cat, top_cat, bottom_cat],
                 )
-                item_ratings['dress'] = {
-                    'rating': dress_rating,
-                    'item': dress,
-                    'item_type': 'dress',
-                    'category': dress.get('category', 'dress'),
-                    'color': dress.get('color', ''),
-                    'warmth_score': dress.get('warmth_score', 3),
-                    'image_link': dress.get('image_link', '')
-                }
-                items_rated.append('dress')
-            else:
-                # Layered outfit - rate each item separately
-                st.markdown("**Rate each clothing item:**")
-                
-                outer = recommendation.get('outer') or {}
-                top = recommendation.get('top') or {}
-                bottom = recommendation.get('bottom') or {}
-                
-                # Outerwear rating
-                if outer:
-                    outer_rating = st.slider(
-                        f"Rate the Outerwear ({outer.get('category', 'Outerwear').title()})",
-                        1, 5, 4,
-                        key="outer_rating",
-                        help="How much do you like this outerwear? (1=Dislike, 5=Love)"
-                    )
-                    item_ratings['outer'] = {
-                        'rating': outer_rating,
-                        'item': outer,
-                        'item_type': 'outer',
-                        'category': outer.get('category', 'jacket'),
-                        'color': outer.get('color', ''),
-                        'warmth_score': outer.get('warmth_score', 3),
-                        'image_link': outer.get('image_link', '')
-                    }
-                    items_rated.append('outer')
-                
-                # Top rating
-                if top:
-                    top_rating = st.slider(
-                        f"Rate the Top ({top.get('category', 'Top').title()})",
-                        1, 5, 4,
-                        key="top_rating",
-                        help="How much do you like this top? (1=Dislike, 5=Love)"
-                    )
-                    item_ratings['top'] = {
-                        'rating': top_rating,
-                        'item': top,
-                        'item_type': 'top',
-                        'category': top.get('category', 't-shirt'),
-                        'color': top.get('color', ''),
-                        'warmth_score': top.get('warmth_score', 3),
-                        'image_link': top.get('image_link', '')
-                    }
-                    items_rated.append('top')
-                
-                # Bottom rating
-                if bottom:
-                    bottom_rating = st.slider(
-                        f"Rate the Bottom ({bottom.get('category', 'Bottom').title()})",
-                        1, 5, 4,
-                        key="bottom_rating",
-                        help="How much do you like this bottom? (1=Dislike, 5=Love)"
-                    )
-                    item_ratings['bottom'] = {
-                        'rating': bottom_rating,
-                        'item': bottom,
-                        'item_type': 'bottom',
-                        'category': bottom.get('category', 'jeans'),
-                        'color': bottom.get('color', ''),
-                        'warmth_score': bottom.get('warmth_score', 3),
-                        'image_link': bottom.get('image_link', '')
-                    }
-                    items_rated.append('bottom')
             
-            # Overall satisfaction (optional)
-            st.markdown("---")
-            overall_satisfaction = st.slider(
-                "Overall Satisfaction",
-                1, 5, 4,
-                key="overall_satisfaction",
-                help="How satisfied are you with this outfit overall?"
-            )
-            
-            if st.button("📝 Submit Feedback", use_container_width=True):
-                # Track feedback with analytics
-                current_rec_id = st.session_state.get('current_rec_id', rec_id)
-                
-                # Calculate average rating for overall metrics
-                avg_item_rating = sum(r['rating'] for r in item_ratings.values()) / len(item_ratings) if item_ratings else overall_satisfaction
-                
-                # Prepare item-specific feedback data
-                item_feedback_data = []
-                low_rated_items = []  # Items with rating 1-3
-                
-                for item_key, item_data in item_ratings.items():
-                    rating = item_data['rating']
-                    item_feedback_data.append({
-                        'item_type': item_data['item_type'],
-                        'category': item_data['category'],
-                        'color': item_data['color'],
-                        'warmth_score': item_data['warmth_score'],
-                        'rating': rating,
-                        'image_link': item_data['image_link']
-                    })
-                    
-                    # Track low-rated items (1-3) for penalty system
-                    if rating <= 3:
-                        low_rated_items.append({
-                            'item_type': item_data['item_type'],
-                            'category': item_data['category'],
-                            'color': item_data['color'],
-                            'warmth_score': item_data['warmth_score'],
-                            'rating': rating
-                        })
-                
-                # Save item-specific feedback to a separate file for recommendation engine
-                from data_manager import save_item_feedback
-                save_item_feedback(
-                    st.session_state.username,
-                    current_rec_id,
-                    item_feedback_data,
-                    {
-                        'city': city,
-                        'temperature': weather_info['temp'],
-                        'outfit_type': recommendation['outfit_type'],
-                        'overall_satisfaction': overall_satisfaction
-                    }
-                )
-                
-                # Legacy feedback format (for backward compatibility)
-                feedback = {
-                    'username': st.session_state.username,
-                    'city': city,
-                    'temperature': weather_info['temp'],
-                    'outfit_type': recommendation['outfit_type'],
-                    'relevance': int(avg_item_rating),  # Use avg item rating as relevance
-                    'satisfaction': overall_satisfaction,
-                    'diversity': 4,  # Default
-                    'item_ratings': item_ratings,  # Include item-specific ratings
-                    'timestamp': datetime.now().isoformat()
-                }
-                
-                # Save to legacy evaluator
-                evaluator.save_user_feedback(feedback)
-                
-                # Save to analytics collector (Huawei-style)
-                analytics.track_feedback(
-                    username=st.session_state.username,
-                    recommendation_id=current_rec_id,
-                    feedback_type='explicit',
-                    ratings={
-                        'relevance': int(avg_item_rating),
-                        'satisfaction': overall_satisfaction,
-                        'diversity': 4
-                    },
-                    items_rated=items_rated,
-                    context={
-                        'city': city,
-                        'temperature': weather_info['temp'],
-                        'outfit_type': recommendation['outfit_type'],
-                        'item_ratings': {k: v['rating'] for k, v in item_ratings.items()}
-                    }
-                )
-                
-                # Track interaction
-                analytics.track_interaction(
-                    username=st.session_state.username,
-                    interaction_type='feedback',
-                    item_id=current_rec_id,
-                    recommendation_id=current_rec_id,
-                    metadata={
-                        'overall_satisfaction': overall_satisfaction,
-                        'item_ratings': {k: v['rating'] for k, v in item_ratings.items()},
-                        'low_rated_items': len(low_rated_items)
-                    }
-                )
-                
-                # Show message about low-rated items
-                if low_rated_items:
-                    low_items_str = ", ".join([f"{item['item_type'].title()}" for item in low_rated_items])
-                    st.success(f"✅ Thank you for your feedback! We'll adjust future recommendations to avoid similar {low_items_str} items.")
-                else:
-                    st.success("✅ Thank you for your feedback! It helps us improve recommendations.")
+            _feedback_panel(recommendation, weather_info, city, rec_id)
         else:
             st.error(recommendation['error'])
     else:
         # Fallback to simple recommendations
-        def outfit_for(weather_data):
-            t = weather_data['temp']
-            cond = weather_data.get('condition', weather_data.get('description', ''))
-            if t < 10:
-                base = ["Warm sweater", "Thermal pants", "Winter coat", "Boots", "Scarf"]
-            elif t < 20:
-                base = ["Long sleeve shirt", "Jeans", "Light jacket", "Sneakers"]
-            else:
-                base = ["T-shirt", "Shorts/Light pants", "Sunglasses", "Sandals"]
-            if "rain" in cond.lower() or "drizzle" in cond.lower():
-                base += ["Umbrella", "Waterproof jacket"]
-            return base
-
-        for item in outfit_for(w_now):
-            st.write(f"✓ {item}")
+        cond = w_now.get('condition', w_now.get('description', ''))
+        st.markdown("\n".join(f"- ✓ {item}" for item in _outfit_for(int(w_now['temp']), cond)))
 
     if wardrobe:
-        st.write("**From Your Wardrobe:**")
-        for item in wardrobe[:3]:
-            st.write(f"• {item['name']} ({item['type']})")
+        st.markdown("**From Your Wardrobe:**\n" + "\n".join(f"- {item['name']} ({item['type']})" for item in wardrobe[:3]))
     else:
         st.info("Add items to your wardrobe to see personalized suggestions!")
 
 # Shopping
-st.markdown("### 🛍️ Fashion Shopping Suggestions")
 preferences = st.session_state.user_data.get("preferences", {})
-a, b, c = st.columns(3)
-with a:
-    styles = ["Minimalist Chic", "Urban Streetwear", "Classic Elegant", "Casual Comfort"]
-    st.markdown("**Trending Styles**")
-    selected_style = st.selectbox("Choose your style:", styles, index=styles.index(preferences.get("style", "Minimalist Chic")), label_visibility="collapsed")
-with b:
-    st.markdown("**Budget Range**")
-if st.button("🔍 Find Perfect Pieces", use_container_width=True):
-    st.markdown("---")
-    
-    # Check if we have a recent recommendation to base shopping on
-    last_recommendation = st.session_state.get('last_recommendation')
-    
-    if use_advanced and rec_engine.wardrobe_df is not None and last_recommendation and "error" not in last_recommendation:
-        with st.spinner("🔍 Finding similar items online..."):
-            # Get user gender for gender-specific shopping results
-            user_gender = str(st.session_state.user_data.get("gender", "Female")).strip()
-            shopping_results = visual_search.find_similar_from_outfit(last_recommendation, gender=user_gender)
-            
-            if shopping_results:
-                st.markdown("**🛍️ Similar Items Available Online:**")
-                st.caption("Based on your AI outfit recommendation")
-                
-                # Display results for each item type
-                for item_type, products in shopping_results.items():
-                    if products:
-                        st.markdown(f"##### {item_type.title()}")
-                        
-                        cols = st.columns(3)
-                        for i, product in enumerate(products):
-                            with cols[i]:
-                                # Display product information without image
-                                st.markdown(f"**{product['name']}**")
-                                st.markdown(f"💰 {product['price']}")
-                                if product.get('match'):
-                                    st.caption(f"Match: {product['match']}")
-                                st.markdown(f"[🏪 Shop at {product['source']}]({product['url']})")
-                        st.markdown("---")
-            else:
-                st.warning("No shopping results found. Try getting a recommendation first!")
-    else:
-        # Fallback to dynamic suggestions based on weather, style, and preferences
-        st.markdown("**🛍️ Curated Shopping Suggestions:**")
-        temp = weather_service.get_current_weather(st.session_state.user_data.get("city", "London"))['temp']
-        user_style = preferences.get("style", "Minimalist Chic")
-        budget = preferences.get("budget", "$$")
-        
-        # Generate varied suggestions based on multiple factors
-        import random
-        random.seed(int(temp) + hash(user_style) + hash(st.session_state.username))
-        
-        # Base suggestions pool with variety
-        cold_suggestions = [
-            [{"name": "Wool Blend Coat", "price": "$120", "style": "Classic", "match": "95%"},
-             {"name": "Cashmere Sweater", "price": "$85", "style": "Elegant", "match": "92%"},
-             {"name": "Thermal Leggings", "price": "$45", "style": "Comfort", "match": "88%"}],
-            [{"name": "Down Puffer Jacket", "price": "$150", "style": "Modern", "match": "94%"},
-             {"name": "Merino Wool Sweater", "price": "$95", "style": "Premium", "match": "91%"},
-             {"name": "Fleece Lined Pants", "price": "$55", "style": "Warm", "match": "89%"}],
-            [{"name": "Parka Winter Coat", "price": "$180", "style": "Outdoor", "match": "93%"},
-             {"name": "Cable Knit Sweater", "price": "$75", "style": "Classic", "match": "90%"},
-             {"name": "Wool Blend Trousers", "price": "$65", "style": "Smart", "match": "87%"}]
-        ]
-        
-        mild_suggestions = [
-            [{"name": "Denim Jacket", "price": "$75", "style": "Casual", "match": "93%"},
-             {"name": "Cotton Hoodie", "price": "$55", "style": "Urban", "match": "90%"},
-             {"name": "Leather Ankle Boots", "price": "$145", "style": "Modern", "match": "88%"}],
-            [{"name": "Lightweight Blazer", "price": "$95", "style": "Smart", "match": "92%"},
-             {"name": "Long Sleeve Tee", "price": "$35", "style": "Minimalist", "match": "89%"},
-             {"name": "Chino Pants", "price": "$60", "style": "Classic", "match": "91%"}],
-            [{"name": "Bomber Jacket", "price": "$85", "style": "Streetwear", "match": "94%"},
-             {"name": "Oversized Sweater", "price": "$65", "style": "Comfort", "match": "90%"},
-             {"name": "Sneakers", "price": "$90", "style": "Sport", "match": "87%"}]
-        ]
-        
-        warm_suggestions = [
-            [{"name": "Linen Shirt", "price": "$65", "style": "Minimalist", "match": "94%"},
-             {"name": "Cotton Shorts", "price": "$40", "style": "Casual", "match": "91%"},
-             {"name": "Canvas Sneakers", "price": "$80", "style": "Sport", "match": "89%"}],
-            [{"name": "Cotton Button-Up", "price": "$55", "style": "Classic", "match": "93%"},
-             {"name": "Lightweight Chinos", "price": "$50", "style": "Smart", "match": "90%"},
-             {"name": "Espadrilles", "price": "$45", "style": "Summer", "match": "88%"}],
-            [{"name": "Tank Top", "price": "$25", "style": "Casual", "match": "92%"},
-             {"name": "Bermuda Shorts", "price": "$45", "style": "Comfort", "match": "89%"},
-             {"name": "Sandals", "price": "$35", "style": "Beach", "match": "91%"}]
-        ]
-        
-        # Select random set based on temperature
-        if temp < 10:
-            suggestions = random.choice(cold_suggestions)
-        elif temp < 20:
-            suggestions = random.choice(mild_suggestions)
-        else:
-            suggestions = random.choice(warm_suggestions)
-        
-        # Adjust prices based on budget preference
-        budget_multiplier = {"$": 0.7, "$$": 1.0, "$$$": 1.5, "$$$$": 2.0}.get(budget, 1.0)
-        for item in suggestions:
-            if "$" in item['price']:
-                try:
-                    base_price = float(item['price'].replace('$', '').replace(',', ''))
-                    new_price = base_price * budget_multiplier
-                    item['price'] = f"${int(new_price)}"
-                except:
-                    pass
-        
-        cols = st.columns(3)
-        for i, item in enumerate(suggestions):
-            with cols[i]:
-                st.markdown(f"**{item['name']}**")
-                st.markdown(f"💰 {item['price']} | {item['style']}")
-                st.markdown(f"✨ Match: {item['match']}")
-                # Add a search link
-                search_query = item['name'].replace(' ', '+')
-                st.markdown(f"[🔍 Search Online](https://www.google.com/search?q={search_query}+fashion)", unsafe_allow_html=True)
+_shopping_panel(w_now, preferences, use_advanced and rec_engine.wardrobe_df is not None)
 
 st.markdown("---")
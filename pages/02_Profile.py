@@ -1,5 +1,6 @@
 import streamlit as st
 from datetime import datetime
+from collections import Counter
 from dotenv import load_dotenv
 
 from ui import inject_css
@@ -7,6 +8,15 @@ from data_manager import get_user, update_user, update_preferences, get_wardrobe
 
 load_dotenv()
 
+# Widget options, with value -> index maps for the selectbox defaults
+_GENDER_OPTIONS = ("Female", "Male")
+_GENDER_IDX = {v: i for i, v in enumerate(_GENDER_OPTIONS)}
+_STYLE_OPTIONS = ("Minimalist Chic", "Urban Streetwear", "Classic Elegant", "Casual Comfort")
+_STYLE_IDX = {v: i for i, v in enumerate(_STYLE_OPTIONS)}
+_BUDGET_OPTIONS = ("$", "$$", "$$$", "$$$$")
+_SIZE_OPTIONS = ("XS", "S", "M", "L", "XL", "XXL")
+_SIZE_IDX = {v: i for i, v in enumerate(_SIZE_OPTIONS)}
+
 inject_css()
 
 # Guard: require login
@@ -29,7 +39,7 @@ with col1:
     st.markdown("---")
     st.markdown("### 👤 Gender")
     current_gender = user_data.get("gender", "Female")
-    new_gender = st.selectbox("Gender", ["Female", "Male"], index=["Female", "Male"].index(current_gender))
+    new_gender = st.selectbox("Gender", _GENDER_OPTIONS, index=_GENDER_IDX.get(current_gender, 0))
     if new_gender != current_gender:
         if st.button("Update Gender"):
             update_user(st.session_state.username, {"gender": new_gender})
@@ -47,15 +57,15 @@ with col1:
 with col2:
     st.markdown("### 🎨 Style Preferences")
     preferences = user_data.get("preferences", {})
-    new_style = st.selectbox("Preferred Style", ["Minimalist Chic", "Urban Streetwear", "Classic Elegant", "Casual Comfort"], index=["Minimalist Chic", "Urban Streetwear", "Classic Elegant", "Casual Comfort"].index(preferences.get("style", "Minimalist Chic")))
-    new_budget = st.select_slider("Budget Range", options=["$", "$$", "$$$", "$$$$"], value=preferences.get("budget", "$$"))
+    new_style = st.selectbox("Preferred Style", _STYLE_OPTIONS, index=_STYLE_IDX.get(preferences.get("style", "Minimalist Chic"), 0))
+    new_budget = st.select_slider("Budget Range", options=_BUDGET_OPTIONS, value=preferences.get("budget", "$$"))
 
     st.markdown("### 📏 Size Information")
     sizes = preferences.get("sizes", {})
     colA, colB = st.columns(2)
     with colA:
-        top_size = st.selectbox("Top Size", ["XS", "S", "M", "L", "XL", "XXL"], index=["XS", "S", "M", "L", "XL", "XXL"].index(sizes.get("top", "M")))
-        bottom_size = st.selectbox("Bottom Size", ["XS", "S", "M", "L", "XL", "XXL"], index=["XS", "S", "M", "L", "XL", "XXL"].index(sizes.get("bottom", "M")))
+        top_size = st.selectbox("Top Size", _SIZE_OPTIONS, index=_SIZE_IDX.get(sizes.get("top", "M"), 2))
+        bottom_size = st.selectbox("Bottom Size", _SIZE_OPTIONS, index=_SIZE_IDX.get(sizes.get("bottom", "M"), 2))
     with colB:
         shoe_size = st.text_input("Shoe Size", value=sizes.get("shoes", "42"))
 
@@ -75,13 +85,10 @@ st.markdown("### 👕 Wardrobe Statistics")
 wardrobe = get_wardrobe(st.session_state.username)
 if wardrobe:
     c1, c2, c3, c4 = st.columns(4)
-    type_counts = {}
-    for item in wardrobe:
-        t = item.get("type", "Other")
-        type_counts[t] = type_counts.get(t, 0) + 1
+    type_counts = Counter(item.get("type", "Other") for item in wardrobe)
     c1.metric("Total Items", len(wardrobe))
-    c2.metric("Tops", type_counts.get("Top", 0))
-    c3.metric("Bottoms", type_counts.get("Bottom", 0))
-    c4.metric("Outerwear", type_counts.get("Outerwear", 0))
+    c2.metric("Tops", type_counts["Top"])
+    c3.metric("Bottoms", type_counts["Bottom"])
+    c4.metric("Outerwear", type_counts["Outerwear"])
 else:
     st.info("Your wardrobe is empty. Start adding items on the Home page!")
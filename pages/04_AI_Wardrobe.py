@@ -3,8 +3,15 @@ from datetime import datetime
 from pathlib import Path
 import os
 import uuid
+import base64
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from dotenv import load_dotenv
-from PIL import Image
+from io import BytesIO
+from PIL import Image, ImageOps
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from ui import inject_css
 from data_manager import add_ai_item, get_ai_wardrobe, update_ai_item, remove_ai_item
@@ -14,6 +21,10 @@ try:
 except ImportError:
     STORAGE_AVAILABLE = False
     print("⚠️ Supabase Storage functions not available")
+try:
+    from openai import OpenAI
+except ImportError:
+    OpenAI = None
 
 load_dotenv()
 
@@ -34,6 +45,239 @@ st.markdown("<p class='subtitle'>Upload clothing photos and let AI analyze them<
 UPLOAD_DIR = Path("data/uploads")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# MIME type for the data URI sent to the vision API (anything else is sent as PNG)
+_MIME_BY_EXT = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+
+def _resolve_key() -> str:
+    """OpenAI API key from Streamlit secrets, falling back to the environment."""
+    try:
+        if 'OPENAI_API_KEY' in st.secrets:
+            return st.secrets["OPENAI_API_KEY"]
+    except Exception:
+        pass
+    return os.getenv("OPENAI_API_KEY")
+
+
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
+    """OpenAI client shared across reruns and sessions so its connection pool is reused."""
+    if OpenAI is None:
+        raise ImportError("openai package not installed")
+    api_key = _resolve_key()
+    if not api_key:
+        raise ValueError("OPENAI_API_KEY not set")
+    return OpenAI(api_key=api_key)
+
+
+# Fields requested from GPT-4 Vision for each clothing item
+_ANALYSIS_FIELDS = """{
+  "type": "jacket|shirt|t-shirt|pants|shorts|dress|skirt|sweater|coat|shoes|accessories",
+  "warmth_level": 1-5 (1=very light/summer, 5=very warm/winter),
+  "color": "dominant color name",
+  "material": "cotton|wool|synthetic|leather|denim|silk|linen|fleece|down|mixed",
+  "season": ["Spring", "Summer", "Fall", "Winter"] (list suitable seasons),
+  "style": "casual|formal|sport|business|streetwear|elegant",
+  "thickness": "thin|medium|thick",
+  "waterproof": true|false,
+  "windproof": true|false,
+  "description": "brief 1-sentence description"
+}"""
+
+_ANALYSIS_PROMPT = f"""Analyze this clothing item and provide detailed parameters in JSON format.
+
+Return ONLY valid JSON with these exact fields:
+{_ANALYSIS_FIELDS}
+
+Be precise and realistic. For warmth: t-shirt=1, hoodie=3, winter coat=5."""
+
+_BATCH_PROMPT = f"""Analyze the clothing item in each image and provide detailed parameters in JSON format.
+
+Return ONLY a valid JSON array with one object per image, in the order the images were given, each with these exact fields:
+{_ANALYSIS_FIELDS}
+
+Be precise and realistic. For warmth: t-shirt=1, hoodie=3, winter coat=5."""
+
+# Images per batched request, to keep the prompt well inside the context window
+_BATCH_MAX_IMAGES = 10
+# In-flight OpenAI requests at once, to stay under the account's rate limits
+_MAX_CONCURRENT_REQUESTS = 8
+
+# Long edge GPT-4o Vision scales photos down to anyway; bigger uploads are shrunk before saving/sending
+_MAX_IMAGE_EDGE = 1024
+
+# Long edge of the wardrobe grid thumbnails (about 2x the grid column width, for high-DPI screens)
+_THUMB_EDGE = 512
+
+# Map color name to hex (simple mapping)
+_COLOR_HEX = {
+    "black": "#000000", "white": "#FFFFFF", "gray": "#808080", "grey": "#808080",
+    "red": "#FF0000", "blue": "#0000FF", "green": "#00FF00", "yellow": "#FFFF00",
+    "orange": "#FFA500", "purple": "#800080", "pink": "#FFC0CB", "brown": "#8B4513",
+    "navy": "#000080", "beige": "#F5F5DC", "khaki": "#F0E68C", "tan": "#D2B48C"
+}
+
+
+def _to_rgb(img: Image.Image) -> Image.Image:
+    """RGB copy for JPEG encoding; transparent areas become white instead of black."""
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        rgba = img.convert("RGBA")
+        background = Image.new("RGB", rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    return img.convert("RGB")
+
+
+def _downscale_image(image_bytes: bytes, mime_type: str) -> tuple:
+    """
+    (bytes, mime) of the image as a JPEG (quality 85) at most _MAX_IMAGE_EDGE px on the long side.
+    Small JPEGs and images PIL can't read are returned unchanged.
+    """
+    try:
+        img = Image.open(BytesIO(image_bytes))
+        if img.format == "JPEG" and max(img.size) <= _MAX_IMAGE_EDGE:
+            return image_bytes, mime_type
+        # Apply the EXIF rotation before it's dropped by the re-encode
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((_MAX_IMAGE_EDGE, _MAX_IMAGE_EDGE), Image.LANCZOS)
+        buf = BytesIO()
+        _to_rgb(img).save(buf, "JPEG", quality=85, optimize=True)
+        return buf.getvalue(), "image/jpeg"
+    except Exception:
+        return image_bytes, mime_type
+
+
+def _thumb_path(image_path) -> Path:
+    """Where the grid thumbnail for a locally stored image lives (next to the original)."""
+    path = Path(image_path)
+    return path.with_name(f"{path.stem}_thumb.jpg")
+
+
+def _save_thumbnail(image_path, image_bytes: bytes) -> bytes:
+    """Write the grid thumbnail for a stored image and return its bytes (the original bytes if PIL can't read it)."""
+    try:
+        img = ImageOps.exif_transpose(Image.open(BytesIO(image_bytes)))
+        img.thumbnail((_THUMB_EDGE, _THUMB_EDGE), Image.LANCZOS)
+        buf = BytesIO()
+        _to_rgb(img).save(buf, "JPEG", quality=80, optimize=True)
+    except Exception:
+        return image_bytes
+    try:
+        _thumb_path(image_path).write_bytes(buf.getvalue())
+    except OSError:
+        pass
+    return buf.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def _load_thumb(image_path: str, mtime: float) -> bytes:
+    """
+    Grid thumbnail bytes for a local image, cached per (path, mtime).
+    Items saved before thumbnails existed get theirs generated on first view.
+    """
+    thumb = _thumb_path(image_path)
+    if thumb.exists() and thumb.stat().st_mtime >= mtime:
+        return thumb.read_bytes()
+    return _save_thumbnail(image_path, Path(image_path).read_bytes())
+
+
+def _image_block(image_bytes: bytes, mime_type: str) -> dict:
+    """Chat content block carrying one (downscaled) image as a base64 data URL."""
+    image_bytes, mime_type = _downscale_image(image_bytes, mime_type)
+    image_data = base64.b64encode(image_bytes).decode('ascii')
+    return {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_data}"}}
+
+
+def _parse_json_reply(text: str):
+    """JSON object or array from a model reply, unwrapping a markdown code block if present."""
+    json_match = re.search(r'```(?:json)?\s*([\[{].*[\]}])\s*```', text, re.DOTALL)
+    if json_match:
+        text = json_match.group(1)
+    return json.loads(text)
+
+
+def _item_from_analysis(data: dict) -> dict:
+    """Wardrobe item parameters from one parsed GPT-4 Vision analysis."""
+    color_name = str(data.get("color", "gray")).lower()
+    return {
+        "type": data.get("type", "shirt"),
+        "warmth_level": int(data.get("warmth_level", 3)),
+        "color": _COLOR_HEX.get(color_name, "#667eea"),
+        "material": data.get("material", "cotton"),
+        "season": data.get("season", ["Spring", "Fall"]),
+        "style": data.get("style", "casual"),
+        "thickness": data.get("thickness", "medium"),
+        "waterproof": bool(data.get("waterproof", False)),
+        "windproof": bool(data.get("windproof", False)),
+        "ai_analyzed": True,
+        "confidence": 0.9,
+        "notes": f"AI: {data.get('description', 'Analyzed by GPT-4 Vision')}",
+    }
+
+
+def _fallback_analysis(error: Exception) -> dict:
+    """Placeholder parameters used when the AI analysis fails."""
+    return {
+        "type": "shirt",
+        "warmth_level": 3,
+        "color": "#667eea",
+        "material": "cotton",
+        "season": ["Spring", "Fall"],
+        "style": "casual",
+        "thickness": "medium",
+        "waterproof": False,
+        "windproof": False,
+        "ai_analyzed": False,
+        "confidence": 0.0,
+        "notes": f"AI analysis failed: {str(error)}",
+    }
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _analyze_bytes(image_bytes: bytes, mime_type: str, _client=None) -> dict:
+    """
+    GPT-4 Vision analysis of one image, cached for a day on the image bytes
+    so re-analyzing the same photo skips the API call. Errors propagate (and aren't cached).
+    Worker threads pass in a client resolved on the script thread.
+    """
+    response = (_client or get_openai_client()).chat.completions.create(
+        model="gpt-4o",  # or gpt-4-vision-preview
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": _ANALYSIS_PROMPT},
+                    _image_block(image_bytes, mime_type),
+                ]
+            }
+        ],
+        max_tokens=500
+    )
+    return _item_from_analysis(_parse_json_reply(response.choices[0].message.content))
+
+
+@st.cache_data(ttl=86400, show_spinner=False)
+def _analyze_batch(images: tuple, _client=None) -> list:
+    """
+    GPT-4 Vision analysis of up to _BATCH_MAX_IMAGES (bytes, mime) pairs in a single request,
+    returning one item dict per image in order. Errors propagate (and aren't cached).
+    """
+    response = (_client or get_openai_client()).chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {
+                "role": "user",
+                "content": [{"type": "text", "text": f"There are {len(images)} images.\n\n{_BATCH_PROMPT}"}]
+                + [_image_block(image_bytes, mime_type) for image_bytes, mime_type in images]
+            }
+        ],
+        max_tokens=400 * len(images)
+    )
+    data = _parse_json_reply(response.choices[0].message.content)
+    if not isinstance(data, list) or len(data) != len(images):
+        raise ValueError(f"expected {len(images)} analyses, got {len(data) if isinstance(data, list) else 1}")
+    return [_item_from_analysis(entry) for entry in data]
+
 
 def analyze_clothing_image(image_path: str, user_input: dict = None) -> dict:
     """
@@ -59,125 +303,76 @@ def analyze_clothing_image(image_path: str, user_input: dict = None) -> dict:
     
     # AI analysis using OpenAI GPT-4 Vision
     try:
-        from openai import OpenAI
-        import base64
-        
-        # Get API key from secrets or env
-        api_key = None
-        try:
-            import streamlit as st
-            if hasattr(st, 'secrets') and 'OPENAI_API_KEY' in st.secrets:
-                api_key = st.secrets["OPENAI_API_KEY"]
-        except:
-            pass
-        
-        if not api_key:
-            api_key = os.getenv("OPENAI_API_KEY")
-        
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY not set")
-        
-        client = OpenAI(api_key=api_key)
-        
-        # Encode image to base64
-        with open(image_path, "rb") as image_file:
-            image_data = base64.b64encode(image_file.read()).decode('utf-8')
-        
-        # Determine image type
-        img_ext = Path(image_path).suffix.lower()
-        mime_type = "image/jpeg" if img_ext in ['.jpg', '.jpeg'] else "image/png"
-        
-        prompt = """Analyze this clothing item and provide detailed parameters in JSON format.
-        
-Return ONLY valid JSON with these exact fields:
-{
-  "type": "jacket|shirt|t-shirt|pants|shorts|dress|skirt|sweater|coat|shoes|accessories",
-  "warmth_level": 1-5 (1=very light/summer, 5=very warm/winter),
-  "color": "dominant color name",
-  "material": "cotton|wool|synthetic|leather|denim|silk|linen|fleece|down|mixed",
-  "season": ["Spring", "Summer", "Fall", "Winter"] (list suitable seasons),
-  "style": "casual|formal|sport|business|streetwear|elegant",
-  "thickness": "thin|medium|thick",
-  "waterproof": true|false,
-  "windproof": true|false,
-  "description": "brief 1-sentence description"
-}
+        image_bytes = Path(image_path).read_bytes()
+        mime_type = _MIME_BY_EXT.get(Path(image_path).suffix.lower(), "image/png")
+        return _analyze_bytes(image_bytes, mime_type)
 
-Be precise and realistic. For warmth: t-shirt=1, hoodie=3, winter coat=5."""
-
-        response = client.chat.completions.create(
-            model="gpt-4o",  # or gpt-4-vision-preview
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": prompt},
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:{mime_type};base64,{image_data}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            max_tokens=500
-        )
-        
-        # Parse JSON from response
-        import json
-        import re
-        
-        text = response.choices[0].message.content
-        # Extract JSON from markdown code blocks if present
-        json_match = re.search(r'```(?:json)?\s*(\{.*?\})\s*```', text, re.DOTALL)
-        if json_match:
-            text = json_match.group(1)
-        
-        data = json.loads(text)
-        
-        # Map color name to hex (simple mapping)
-        color_map = {
-            "black": "#000000", "white": "#FFFFFF", "gray": "#808080", "grey": "#808080",
-            "red": "#FF0000", "blue": "#0000FF", "green": "#00FF00", "yellow": "#FFFF00",
-            "orange": "#FFA500", "purple": "#800080", "pink": "#FFC0CB", "brown": "#8B4513",
-            "navy": "#000080", "beige": "#F5F5DC", "khaki": "#F0E68C", "tan": "#D2B48C"
-        }
-        color_name = data.get("color", "gray").lower()
-        hex_color = color_map.get(color_name, "#667eea")
-        
-        return {
-            "type": data.get("type", "shirt"),
-            "warmth_level": int(data.get("warmth_level", 3)),
-            "color": hex_color,
-            "material": data.get("material", "cotton"),
-            "season": data.get("season", ["Spring", "Fall"]),
-            "style": data.get("style", "casual"),
-            "thickness": data.get("thickness", "medium"),
-            "waterproof": bool(data.get("waterproof", False)),
-            "windproof": bool(data.get("windproof", False)),
-            "ai_analyzed": True,
-            "confidence": 0.9,
-            "notes": f"AI: {data.get('description', 'Analyzed by GPT-4 Vision')}",
-        }
-        
     except Exception as e:
         print(f"OpenAI API Error: {e}")
         # Fallback to placeholder
-        return {
-            "type": "shirt",
-            "warmth_level": 3,
-            "color": "#667eea",
-            "material": "cotton",
-            "season": ["Spring", "Fall"],
-            "style": "casual",
-            "thickness": "medium",
-            "waterproof": False,
-            "windproof": False,
-            "ai_analyzed": False,
-            "confidence": 0.0,
-            "notes": f"AI analysis failed: {str(e)}",
-        }
+        return _fallback_analysis(e)
+
+
+def _try_batch(client, batch: tuple):
+    """Item dicts for a multi-image batch, or None if it's a single image or the batched call failed."""
+    if len(batch) == 1:
+        return None
+    try:
+        return _analyze_batch(batch, _client=client)
+    except Exception as e:
+        print(f"OpenAI batch error, analyzing images one by one: {e}")
+        return None
+
+
+def _analyze_one(client, image: tuple) -> dict:
+    """Item dict for one (bytes, mime) image, or the placeholder if the call fails."""
+    try:
+        return _analyze_bytes(*image, _client=client)
+    except Exception as e:
+        print(f"OpenAI API Error: {e}")
+        return _fallback_analysis(e)
+
+
+def _map_concurrently(fn, items: list) -> list:
+    """
+    fn(item) for every item on up to _MAX_CONCURRENT_REQUESTS threads, results in input order.
+    Each worker is attached to this script run's context, so st.cache_data works in them.
+    """
+    if not items:
+        return []
+    with ThreadPoolExecutor(
+        max_workers=min(_MAX_CONCURRENT_REQUESTS, len(items)),
+        initializer=add_script_run_ctx,
+        initargs=(None, get_script_run_ctx()),
+    ) as pool:
+        return list(pool.map(fn, items))
+
+
+def analyze_clothing_images(images: list) -> list:
+    """
+    Analyze several (bytes, mime) images, sending up to _BATCH_MAX_IMAGES per GPT-4 Vision request.
+    Batches run concurrently; images whose batch can't be used are analyzed one per request, also concurrently.
+    """
+    if not images:
+        return []
+    # Secrets and the shared client are resolved here, on the script thread
+    try:
+        client = get_openai_client()
+    except Exception as e:
+        print(f"OpenAI API Error: {e}")
+        return [_fallback_analysis(e) for _ in images]
+
+    batches = [tuple(images[i:i + _BATCH_MAX_IMAGES]) for i in range(0, len(images), _BATCH_MAX_IMAGES)]
+    batch_results = _map_concurrently(partial(_try_batch, client), batches)
+
+    singles = [image for batch, result in zip(batches, batch_results) if result is None for image in batch]
+    single_results = iter(_map_concurrently(partial(_analyze_one, client), singles))
+    # Stitch results back together in upload order
+    return [
+        item
+        for batch, result in zip(batches, batch_results)
+        for item in (result if result is not None else [next(single_results) for _ in batch])
+    ]
 
 
 # Upload section
@@ -193,40 +388,50 @@ with col_upload:
     )
     
     if uploaded_file:
-        image = Image.open(uploaded_file)
-        st.image(image, caption="Uploaded Image", use_container_width=True)
-        
-        # Save uploaded file
-        file_ext = uploaded_file.name.split(".")[-1]
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{st.session_state.username}_{timestamp}.{file_ext}"
-        save_path = UPLOAD_DIR / filename
-        
-        with open(save_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        # Upload to Supabase Storage if available
-        storage_url = None
-        if STORAGE_AVAILABLE:
-            with st.spinner("☁️ Uploading to cloud storage..."):
-                storage_url = upload_image_to_storage(str(save_path), st.session_state.username)
+        # Read the upload once; the same bytes feed the preview and the (downscaled) saved file
+        raw = uploaded_file.getvalue()
+        st.image(raw, caption="Uploaded Image", use_container_width=True)
+
+        # Save (and push to storage) once per uploaded file, not on every rerun
+        if st.session_state.get("temp_upload_id") != uploaded_file.file_id:
+            file_ext = uploaded_file.name.split(".")[-1]
+            stored, mime_type = _downscale_image(raw, _MIME_BY_EXT.get(f".{file_ext.lower()}", "image/png"))
+            if mime_type == "image/jpeg":
+                file_ext = "jpg"
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"{st.session_state.username}_{timestamp}.{file_ext}"
+            save_path = UPLOAD_DIR / filename
+            save_path.write_bytes(stored)
+            _save_thumbnail(save_path, stored)
+
+            # Upload to Supabase Storage if available
+            storage_url = None
+            if STORAGE_AVAILABLE:
+                with st.spinner("☁️ Uploading to cloud storage..."):
+                    storage_url = upload_image_to_storage(str(save_path), st.session_state.username)
                 if storage_url:
                     st.success(f"✅ Image uploaded to cloud storage")
-                else:
-                    st.error("⚠️ **Permission Denied!** Storage policies not configured")
-                    
-                    st.markdown("""
-                    <div style='background: #fee2e2; padding: 1.5rem; border-radius: 8px; border-left: 4px solid #ef4444; margin: 1rem 0;'>
-                        <h4 style='margin-top: 0; color: #991b1b;'>🔒 Fix: Add Storage Policies</h4>
-                        <p><strong>Error:</strong> "new row violates row-level security policy"</p>
-                        <p style='margin-top: 1rem;'><strong>Solution:</strong> Run this SQL in Supabase:</p>
-                        
-                        <ol style='margin: 1rem 0; padding-left: 1.5rem;'>
-                            <li>Open <a href='https://supabase.com/dashboard/project/xgvawonuusadqscxkuhu/sql/new' target='_blank'><strong>SQL Editor</strong></a></li>
-                            <li>Paste this code:</li>
-                        </ol>
-                        
-                        <pre style='background: #1f2937; color: #10b981; padding: 1rem; border-radius: 6px; overflow-x: auto; margin: 1rem 0; font-size: 0.9rem;'><code>-- Allow public uploads
+
+            # Store both paths in session
+            st.session_state.temp_upload_id = uploaded_file.file_id
+            st.session_state.temp_image_path = str(save_path)
+            st.session_state.temp_storage_url = storage_url
+
+        if STORAGE_AVAILABLE and not st.session_state.get("temp_storage_url"):
+            st.error("⚠️ **Permission Denied!** Storage policies not configured")
+            
+            st.markdown("""
+            <div style='background: #fee2e2; padding: 1.5rem; border-radius: 8px; border-left: 4px solid #ef4444; margin: 1rem 0;'>
+                <h4 style='margin-top: 0; color: #991b1b;'>🔒 Fix: Add Storage Policies</h4>
+                <p><strong>Error:</strong> "new row violates row-level security policy"</p>
+                <p style='margin-top: 1rem;'><strong>Solution:</strong> Run this SQL in Supabase:</p>
+                
+                <ol style='margin: 1rem 0; padding-left: 1.5rem;'>
+                    <li>Open <a href='https://supabase.com/dashboard/project/xgvawonuusadqscxkuhu/sql/new' target='_blank'><strong>SQL Editor</strong></a></li>
+                    <li>Paste this code:</li>
+                </ol>
+                
+                <pre style='background: #1f2937; color: #10b981; padding: 1rem; border-radius: 6px; overflow-x: auto; margin: 1rem 0; font-size: 0.9rem;'><code>-- Allow public uploads
 CREATE POLICY "Allow public uploads to wardrobe-images"
 ON storage.objects FOR INSERT
 TO public
@@ -237,21 +442,17 @@ CREATE POLICY "Public images are viewable"
 ON storage.objects FOR SELECT
 TO public
 USING (bucket_id = 'wardrobe-images');</code></pre>
-                        
-                        <ol start='3' style='margin: 1rem 0; padding-left: 1.5rem;'>
-                            <li>Click <strong>"Run"</strong> button</li>
-                            <li><strong>Refresh this page</strong> and upload again!</li>
-                        </ol>
-                        
-                        <p style='margin-top: 1rem; margin-bottom: 0; padding-top: 1rem; border-top: 1px solid #fca5a5;'>
-                            <small>💡 <strong>Also check:</strong> Bucket must be <strong>Public</strong> in <a href='https://supabase.com/dashboard/project/xgvawonuusadqscxkuhu/storage/buckets/wardrobe-images' target='_blank'>bucket settings</a></small>
-                        </p>
-                    </div>
-                    """, unsafe_allow_html=True)
-        
-        # Store both paths in session
-        st.session_state.temp_image_path = str(save_path)
-        st.session_state.temp_storage_url = storage_url
+                
+                <ol start='3' style='margin: 1rem 0; padding-left: 1.5rem;'>
+                    <li>Click <strong>"Run"</strong> button</li>
+                    <li><strong>Refresh this page</strong> and upload again!</li>
+                </ol>
+                
+                <p style='margin-top: 1rem; margin-bottom: 0; padding-top: 1rem; border-top: 1px solid #fca5a5;'>
+                    <small>💡 <strong>Also check:</strong> Bucket must be <strong>Public</strong> in <a href='https://supabase.com/dashboard/project/xgvawonuusadqscxkuhu/storage/buckets/wardrobe-images' target='_blank'>bucket settings</a></small>
+                </p>
+            </div>
+            """, unsafe_allow_html=True)
 
 with col_params:
     st.markdown("### 🔧 Item Parameters")
@@ -370,15 +571,50 @@ with col_params:
             st.success("✅ Item added to your AI wardrobe!")
             
             # Clear temp data
-            if "temp_image_path" in st.session_state:
-                del st.session_state.temp_image_path
-            if "temp_storage_url" in st.session_state:
-                del st.session_state.temp_storage_url
-            if "ai_analysis" in st.session_state:
-                del st.session_state.ai_analysis
+            for key in ("temp_upload_id", "temp_image_path", "temp_storage_url", "ai_analysis"):
+                st.session_state.pop(key, None)
             
             st.rerun()
 
+# Bulk upload: analyze several photos with one batched AI request per 10 images
+with st.expander("📦 Add Several Items at Once"):
+    # Result of the last bulk add, carried across the rerun that clears the uploader
+    bulk_message = st.session_state.pop("_bulk_upload_message", None)
+    if bulk_message:
+        st.success(bulk_message)
+    bulk_files = st.file_uploader(
+        "Choose images",
+        type=["jpg", "jpeg", "png"],
+        accept_multiple_files=True,
+        # A fresh key after each bulk add empties the uploader, so the same files aren't added twice
+        key=f"bulk_upload_{st.session_state.get('_bulk_upload_gen', 0)}",
+        help="Each photo is analyzed by AI and added with the predicted parameters"
+    )
+    if bulk_files and st.button(f"🤖 Analyze & Add {len(bulk_files)} Items", use_container_width=True):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        images = [
+            _downscale_image(f.getvalue(), _MIME_BY_EXT.get(Path(f.name).suffix.lower(), "image/png"))
+            for f in bulk_files
+        ]
+        with st.spinner("🔍 Analyzing images with GPT-4 Vision..."):
+            analyses = analyze_clothing_images(images)
+        for i, ((stored, mime_type), f, analysis) in enumerate(zip(images, bulk_files, analyses)):
+            ext = "jpg" if mime_type == "image/jpeg" else f.name.split(".")[-1]
+            save_path = UPLOAD_DIR / f"{st.session_state.username}_{timestamp}_{i}.{ext}"
+            save_path.write_bytes(stored)
+            _save_thumbnail(save_path, stored)
+            storage_url = upload_image_to_storage(str(save_path), st.session_state.username) if STORAGE_AVAILABLE else None
+            add_ai_item(st.session_state.username, {
+                "id": str(uuid.uuid4()),
+                "image_path": storage_url or str(save_path),
+                "added_at": datetime.now().isoformat(),
+                **analysis
+            })
+        n_ai = sum(a.get("ai_analyzed", False) for a in analyses)
+        st.session_state._bulk_upload_message = f"✅ Added {len(analyses)} items ({n_ai} analyzed by AI)"
+        st.session_state._bulk_upload_gen = st.session_state.get("_bulk_upload_gen", 0) + 1
+        st.rerun()
+
 # Display existing AI wardrobe
 st.markdown("---")
 st.markdown("### 👕 Your AI Wardrobe")
@@ -409,9 +645,8 @@ else:
                     # It's a cloud URL
                     st.image(image_path, use_container_width=True)
                 elif os.path.exists(image_path):
-                    # It's a local path
-                    img = Image.open(image_path)
-                    st.image(img, use_container_width=True)
+                    # It's a local path: show the small cached thumbnail, not the full image
+                    st.image(_load_thumb(image_path, os.path.getmtime(image_path)), use_container_width=True)
                 else:
                     st.warning("Image not found")
                 
@@ -16,6 +16,7 @@ from pathlib import Path
 from typing import Dict, List, Optional, Union
 from datetime import datetime, timedelta
 import os
+import threading
 
 
 class RecommendationEngine:
@@ -64,6 +65,8 @@ class RecommendationEngine:
         # Layer 3: History tracking for diversification
         self.history_file = Path(history_file) if history_file else Path("data/wardrobe_history.json")
         self.wardrobe_history = self._load_history()
+        # The app shares one engine across sessions; serializes history updates and saves
+        self._history_lock = threading.Lock()
         
         if dataset_path and Path(dataset_path).exists():
             self.load_dataset(dataset_path)
@@ -93,6 +96,10 @@ class RecommendationEngine:
             with open(dataset_path, 'r') as f:
                 wardrobe_data = json.load(f)
             self.wardrobe_df = pd.DataFrame(wardrobe_data)
+            # Columns filtered on every recommendation: compare category codes, not Python strings
+            for column in ('category', 'outer_inner', 'color'):
+                if column in self.wardrobe_df:
+                    self.wardrobe_df[column] = self.wardrobe_df[column].astype('category')
             print(f"✅ Loaded {len(self.wardrobe_df)} items from dataset")
             return True
         except Exception as e:
@@ -262,7 +269,8 @@ class RecommendationEngine:
         
         return 0.0
     
-    def _calculate_feedback_penalty(self, item: Dict, component_type: str, username: Optional[str] = None) -> float:
+    def _calculate_feedback_penalty(self, item: Dict, component_type: str, username: Optional[str] = None,
+                                    patterns: Optional[Dict] = None) -> float:
         """
         Calculate penalty based on user's feedback on similar items.
         Applies penalties to items that match patterns from low-rated items (rating 1-3).
@@ -271,6 +279,7 @@ class RecommendationEngine:
             item: Garment item dictionary
             component_type: "Outer", "Top", "Bottom", or "Dress"
             username: Username to load feedback for (optional)
+            patterns: Low-rated item patterns already loaded for username (optional)
             
         Returns:
             Penalty value (negative for items similar to low-rated ones)
@@ -278,11 +287,8 @@ class RecommendationEngine:
         if not username:
             return 0.0
         
-        try:
-            from data_manager import get_low_rated_item_patterns
-            patterns = get_low_rated_item_patterns(username)
-        except ImportError:
-            return 0.0
+        if patterns is None:
+            patterns = self._load_feedback_patterns(username)
         
         if not patterns or not patterns.get('low_rated_items'):
             return 0.0
@@ -368,8 +374,19 @@ class RecommendationEngine:
         # Total penalty can range from -15 (rating 1, same type) to -30+ (rating 1, exact match)
         return penalty
     
+    def _load_feedback_patterns(self, username: Optional[str]) -> Optional[Dict]:
+        """Low-rated item patterns for username, or None without a user or data_manager."""
+        if not username:
+            return None
+        try:
+            from data_manager import get_low_rated_item_patterns
+        except ImportError:
+            return None
+        return get_low_rated_item_patterns(username)
+    
     def rank_garments(self, garments_df: pd.DataFrame, required_scores: Dict, 
-                     component_type: str, username: Optional[str] = None) -> List[Dict]:
+                     component_type: str, username: Optional[str] = None,
+                     feedback_patterns: Optional[Dict] = None) -> List[Dict]:
         """
         Rank garments based on fitness to required weather scores.
         
@@ -378,6 +395,7 @@ class RecommendationEngine:
             required_scores: Required attribute scores from weather
             component_type: "Outer", "Top", "Bottom", or "Dress"
             username: Optional username for feedback-based penalties
+            feedback_patterns: Patterns already loaded for username, to avoid re-reading feedback
             
         Returns:
             List of top-ranked garments with fitness scores
@@ -422,9 +440,11 @@ class RecommendationEngine:
             axis=1
         )
         
-        # Feedback-based penalty (for low-rated items)
+        # Feedback-based penalty (for low-rated items); feedback is read once, not per row
+        if feedback_patterns is None:
+            feedback_patterns = self._load_feedback_patterns(username)
         df_filtered['feedback_penalty'] = df_filtered.apply(
-            lambda row: self._calculate_feedback_penalty(row.to_dict(), component_type, username), 
+            lambda row: self._calculate_feedback_penalty(row.to_dict(), component_type, username, feedback_patterns or {}), 
             axis=1
         )
         
@@ -477,9 +497,12 @@ class RecommendationEngine:
         # Compute requirements
         required_scores = self.compute_required_scores(weather_data)
         
+        # User feedback is read once for every ranking below
+        feedback_patterns = self._load_feedback_patterns(username)
+        
         # Check for dress option first (if not too cold)
         if required_scores['warmth'] <= 3:
-            dress_ranks = self.rank_garments(wardrobe, required_scores, "Dress", username)
+            dress_ranks = self.rank_garments(wardrobe, required_scores, "Dress", username, feedback_patterns)
             if dress_ranks:
                 best_dress = dress_ranks[0]
                 
@@ -498,9 +521,9 @@ class RecommendationEngine:
                 }
         
         # Build layered outfit with greedy strategy + Layer 4 color matching
-        top_ranks = self.rank_garments(wardrobe, required_scores, "Top", username)
-        bottom_ranks = self.rank_garments(wardrobe, required_scores, "Bottom", username)
-        outer_ranks = self.rank_garments(wardrobe, required_scores, "Outer", username)
+        top_ranks = self.rank_garments(wardrobe, required_scores, "Top", username, feedback_patterns)
+        bottom_ranks = self.rank_garments(wardrobe, required_scores, "Bottom", username, feedback_patterns)
+        outer_ranks = self.rank_garments(wardrobe, required_scores, "Outer", username, feedback_patterns)
         
         if not top_ranks or not bottom_ranks:
             return {"error": "Insufficient wardrobe items for recommendation"}
@@ -563,12 +586,13 @@ class RecommendationEngine:
         
         now_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        for item in outfit['items']:
-            image_link = item.get('image_link')
-            if image_link:
-                self.wardrobe_history[image_link] = now_str
-        
-        self._save_history()
+        with self._history_lock:
+            for item in outfit['items']:
+                image_link = item.get('image_link')
+                if image_link:
+                    self.wardrobe_history[image_link] = now_str
+            
+            self._save_history()
     
     def recommend_from_user_wardrobe(self, user_wardrobe: List[Dict], 
                                     weather_data: Dict) -> Dict:
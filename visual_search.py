@@ -9,6 +9,7 @@ import random
 import hashlib
 from typing import List, Dict, Optional
 from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
 
 
 class VisualSearchService:
@@ -143,7 +144,8 @@ class VisualSearchService:
         # This ensures same items get same results, but different items get different results
         seed_string = f"{category_lower}_{color}_{gender}_{item_description.get('warmth_score', 3)}"
         seed = int(hashlib.md5(seed_string.encode()).hexdigest()[:8], 16)
-        random.seed(seed)
+        # Private generator so concurrent searches don't share (and reseed) the global one
+        rng = random.Random(seed)
         
         # Generate realistic mock products with actual placeholder images
         # Products are organized by exact category match
@@ -263,7 +265,7 @@ class VisualSearchService:
         
         # Shuffle products to add variety (but keep seed-based consistency)
         products = matching_products.copy()
-        random.shuffle(products)
+        rng.shuffle(products)
         
         # Clean and format color name
         color_clean = ""
@@ -311,7 +313,7 @@ class VisualSearchService:
             
             # Vary match percentage slightly
             base_match = 95 - i * 3
-            match_variation = random.randint(-2, 2)
+            match_variation = rng.randint(-2, 2)
             match_score = max(85, min(98, base_match + match_variation))
             
             # Build search query with gender for better results
@@ -342,34 +344,25 @@ class VisualSearchService:
         Returns:
             Dictionary mapping item type to list of similar products
         """
-        results = {}
-        
         if recommendation.get('outfit_type') == 'Dress':
-            dress = recommendation.get('dress', {})
-            # Pass the actual recommended item so we can use its image
-            results['dress'] = self.search_by_description(dress, max_results=3, gender=gender, recommended_item=dress)
-        
+            items = {'dress': recommendation.get('dress', {})}
         elif recommendation.get('outfit_type') == 'Layered':
-            # Search for each layer
-            if recommendation.get('outer'):
-                results['outer'] = self.search_by_description(
-                    recommendation['outer'], max_results=3, gender=gender, 
-                    recommended_item=recommendation['outer']
-                )
-            
-            if recommendation.get('top'):
-                results['top'] = self.search_by_description(
-                    recommendation['top'], max_results=3, gender=gender,
-                    recommended_item=recommendation['top']
-                )
-            
-            if recommendation.get('bottom'):
-                results['bottom'] = self.search_by_description(
-                    recommendation['bottom'], max_results=3, gender=gender,
-                    recommended_item=recommendation['bottom']
-                )
+            # Search for each layer present
+            items = {key: recommendation[key] for key in ('outer', 'top', 'bottom') if recommendation.get(key)}
+        else:
+            items = {}
         
-        return results
+        # Pass the actual recommended item so we can use its image
+        def search(item):
+            return self.search_by_description(item, max_results=3, gender=gender, recommended_item=item)
+        
+        if not (self.google_api_key and self.google_cse_id) or len(items) < 2:
+            return {key: search(item) for key, item in items.items()}
+        
+        # One HTTP round trip per item: issue them concurrently
+        with ThreadPoolExecutor(max_workers=len(items)) as pool:
+            futures = {key: pool.submit(search, item) for key, item in items.items()}
+        return {key: future.result() for key, future in futures.items()}
 
 
 # Convenience function